@@ -10,22 +10,25 @@ Commands:
 - /verbose: Toggle verbose output showing segmentation results (with token counts)
 - /audio: Toggle audio playback on/off
 - /language: Switch between English and Chinese voices
-- /performance: Benchmark last response across all modes
+- /performance [ms]: Benchmark last response across all modes, optionally
+  pacing simulated tokens by [ms] per word
 - /help: Show commands cheatsheet
 - /exit: Quit demo
 """
 
 import asyncio
+from collections import deque
 from collections.abc import AsyncIterator
 from enum import Enum
+import io
 import os
 from pathlib import Path
 
 # Import nanoTTS
 import sys
-import tempfile
+import threading
 import time
-from typing import Any, Optional
+from typing import Any, Optional, Union
 
 import anyio
 from dotenv import load_dotenv
@@ -47,8 +50,124 @@ class SynthMode(Enum):
     FULL_TEXT = "full-text"
 
 
-async def play_audio_chunk(chunk: AudioChunk, verbose: bool = False) -> None:
-    """Play audio chunk using sounddevice."""
+# Playback threads only decode and enqueue, but keep them on their own pool
+# instead of competing with transcoding on AnyIO's default limiter
+_PLAYBACK_LIMITER = anyio.CapacityLimiter(3 * (os.cpu_count() or 1))
+
+
+def pcm_to_float32(data: bytes, dtype: type, scale: float, channels: int) -> np.ndarray:
+    """Scale integer PCM to float32 in one pass with a single allocation."""
+    samples = np.frombuffer(data, dtype=dtype)  # Zero-copy view
+
+    # A fresh buffer per chunk: queued audio is still being read by the
+    # output callback, so it can't be reused for the next chunk
+    out = np.empty(samples.size, dtype=np.float32)
+    np.multiply(
+        samples, np.float32(1.0 / scale), out=out, dtype=np.float32, casting="unsafe"
+    )
+
+    # Reshape for channels (view, no copy)
+    if channels > 1:
+        out = out.reshape(-1, channels)
+    return out
+
+
+def pcm24_to_float32(data: bytes, channels: int) -> np.ndarray:
+    """Unpack packed little-endian 24-bit PCM to float32.
+
+    Each 3-byte sample is placed in the top bytes of an int32, which sign
+    extends it as value << 8; scaling by 2**-31 then yields value / 2**23.
+    """
+    packed = np.frombuffer(data, dtype=np.uint8)
+    packed = packed[: packed.size - packed.size % 3].reshape(-1, 3)
+
+    samples = np.zeros(packed.shape[0], dtype=np.int32)
+    samples.view(np.uint8).reshape(-1, 4)[:, 1:] = packed
+
+    out = np.multiply(samples, np.float32(1.0 / 2147483648.0), dtype=np.float32)
+    if channels > 1:
+        out = out.reshape(-1, channels)
+    return out
+
+
+class AudioOutput:
+    """One long-lived sounddevice stream fed from a queue of decoded chunks.
+
+    Enqueueing returns immediately, so the next chunk decodes while the
+    previous one is still playing.
+    """
+
+    def __init__(self, blocksize: int = 1024):
+        self._blocksize = blocksize
+        self._stream: Optional[sd.OutputStream] = None
+        self._format: Optional[tuple[int, int]] = None  # (sample_rate, channels)
+        self._queue: deque[np.ndarray] = deque()
+        self._current: Optional[np.ndarray] = None
+        self._position = 0
+        self._lock = threading.Lock()
+        self._drained = threading.Event()
+        self._drained.set()
+
+    def _callback(self, outdata: np.ndarray, frames: int, time_info, status) -> None:
+        written = 0
+        with self._lock:
+            while written < frames:
+                if self._current is None:
+                    if not self._queue:
+                        break
+                    self._current = self._queue.popleft()
+                    self._position = 0
+
+                count = min(frames - written, len(self._current) - self._position)
+                outdata[written : written + count] = self._current[
+                    self._position : self._position + count
+                ]
+                written += count
+                self._position += count
+                if self._position >= len(self._current):
+                    self._current = None
+
+            if written < frames:
+                outdata[written:] = 0
+                self._drained.set()
+
+    def enqueue(self, audio: np.ndarray, sample_rate: int) -> None:
+        """Queue float32 audio for playback, reopening the device on format change."""
+        audio = audio.reshape(len(audio), -1)  # (frames, channels)
+        audio_format = (sample_rate, audio.shape[1])
+
+        if audio_format != self._format:
+            self.wait()
+            self.close()
+            self._stream = sd.OutputStream(
+                samplerate=sample_rate,
+                channels=audio_format[1],
+                dtype="float32",
+                blocksize=self._blocksize,
+                callback=self._callback,
+            )
+            self._stream.start()
+            self._format = audio_format
+
+        with self._lock:
+            self._queue.append(audio)
+            self._drained.clear()
+
+    def wait(self) -> None:
+        """Block until everything queued so far has been played."""
+        self._drained.wait()
+
+    def close(self) -> None:
+        if self._stream is not None:
+            self._stream.close()
+            self._stream = None
+            self._format = None
+
+
+async def play_audio_chunk(
+    chunk: AudioChunk, output: AudioOutput, verbose: bool = False
+) -> None:
+    """Decode audio chunk and queue it on the output stream."""
     try:
         # Convert audio chunk to numpy array for playback
         def convert_and_play(data: bytes, spec: AudioSpec) -> None:
@@ -56,11 +175,16 @@ async def play_audio_chunk(chunk: AudioChunk, verbose: bool = False) -> None:
                 if spec.codec == "pcm":
                     # Direct PCM data
                     if spec.sample_width == 16:
-                        dtype = np.int16
-                        scale = 32768.0
-                    elif spec.sample_width == 24 or spec.sample_width == 32:
-                        dtype = np.int32
-                        scale = 2147483648.0
+                        audio_array = pcm_to_float32(
+                            data, np.int16, 32768.0, spec.channels
+                        )
+                    elif spec.sample_width == 24:
+                        # Packed 3-byte samples need unpacking first
+                        audio_array = pcm24_to_float32(data, spec.channels)
+                    elif spec.sample_width == 32:
+                        audio_array = pcm_to_float32(
+                            data, np.int32, 2147483648.0, spec.channels
+                        )
                     else:
                         if verbose:
                             print(
@@ -68,42 +192,28 @@ async def play_audio_chunk(chunk: AudioChunk, verbose: bool = False) -> None:
                             )
                         return
 
-                    # Convert bytes to numpy array
-                    audio_array = np.frombuffer(data, dtype=dtype)
-
-                    # Reshape for channels
-                    if spec.channels > 1:
-                        audio_array = audio_array.reshape(-1, spec.channels)
-
-                    # Convert to float for sounddevice
-                    audio_array = audio_array.astype(np.float32) / scale
-
                 else:
                     # Use soundfile to decode compressed formats (MP3, etc.)
-                    with tempfile.NamedTemporaryFile(
-                        suffix=f".{spec.codec}"
-                    ) as temp_file:
-                        temp_file.write(data)
-                        temp_file.flush()
-
-                        audio_array, sample_rate = sf.read(temp_file.name)
-                        if spec.sample_rate != sample_rate and verbose:
-                            print(
-                                f"   ⚠️ Sample rate mismatch: expected {spec.sample_rate}, got {sample_rate}"
-                            )
-
-                        audio_array = audio_array.astype(np.float32)
+                    # straight from memory
+                    audio_array, sample_rate = sf.read(
+                        io.BytesIO(data), dtype="float32"
+                    )
+                    if spec.sample_rate != sample_rate and verbose:
+                        print(
+                            f"   ⚠️ Sample rate mismatch: expected {spec.sample_rate}, got {sample_rate}"
+                        )
 
-                # Play the audio
-                sd.play(audio_array, samplerate=spec.sample_rate)
-                sd.wait()  # Wait for playback to complete
+                # Queue the audio; playback continues in the stream callback
+                output.enqueue(audio_array, spec.sample_rate)
 
             except Exception as e:
                 if verbose:
                     print(f"   ❌ Audio conversion/playback error: {e}")
 
         # Run in thread pool to avoid blocking
-        await anyio.to_thread.run_sync(convert_and_play, chunk.data, chunk.spec)
+        await anyio.to_thread.run_sync(
+            convert_and_play, chunk.data, chunk.spec, limiter=_PLAYBACK_LIMITER
+        )
 
     except Exception as e:
         if verbose:
@@ -120,6 +230,7 @@ class InteractiveDemo:
         self.mode = SynthMode.TOKEN_FEEDING
         self.verbose = True  # Default to verbose mode
         self.audio_enabled = True
+        self.simulate_timing = False  # Pace muted playback at real audio speed
         self.last_response = ""
         self.language = "en"  # Current language: "en" or "zh"
 
@@ -132,6 +243,9 @@ class InteractiveDemo:
         # Initialize tiktoken encoder for token counting
         self.encoder = tiktoken.get_encoding("cl100k_base")
 
+        # Shared output stream; chunks are queued and play back-to-back
+        self.audio_output = AudioOutput()
+
     def load_config(self) -> bool:
         """Load API configuration from .env file."""
         load_dotenv()
@@ -186,7 +300,10 @@ class InteractiveDemo:
             ("/verbose", "Toggle verbose segmentation output (shows token counts)"),
             ("/audio", "Toggle audio playback on/off"),
             ("/language", "Switch between English (🇦🇺) and Chinese (🇨🇳) voices"),
-            ("/performance", "Benchmark last response across all modes"),
+            (
+                "/performance [ms]",
+                "Benchmark last response across all modes (optional ms/word pacing)",
+            ),
             ("/help", "Show this help message"),
             ("/exit", "Quit demo"),
         ]
@@ -222,8 +339,13 @@ class InteractiveDemo:
             )
 
             async for chunk in stream:
-                if chunk.choices[0].delta.content:
-                    yield chunk.choices[0].delta.content
+                # Resolve the delta once per chunk; some providers also send
+                # chunks without choices (e.g. trailing usage stats)
+                if not chunk.choices:
+                    continue
+                content = chunk.choices[0].delta.content
+                if content:
+                    yield content
 
         except Exception as e:
             self.console.print(f"[red]LLM Error: {e}[/red]")
@@ -238,9 +360,51 @@ class InteractiveDemo:
             )
 
         if self.audio_enabled:
-            await play_audio_chunk(chunk, self.verbose)
-        else:
-            await anyio.sleep(0.1)  # Simulate playback timing
+            await play_audio_chunk(chunk, self.audio_output, self.verbose)
+        elif self.simulate_timing and chunk.spec.codec == "pcm":
+            # Sleep for the chunk's real duration (compressed audio is skipped)
+            spec = chunk.spec
+            bytes_per_second = spec.sample_rate * spec.channels * spec.sample_width // 8
+            await anyio.sleep(len(chunk.data) / bytes_per_second)
+
+    async def wait_for_playback(self) -> None:
+        """Wait until queued audio has finished playing."""
+        if self.audio_enabled:
+            await anyio.to_thread.run_sync(
+                self.audio_output.wait, limiter=_PLAYBACK_LIMITER
+            )
+
+    async def stream_and_play(
+        self, source: Union[str, AsyncIterator[str]]
+    ) -> tuple[Optional[float], int]:
+        """Play chunk N while chunk N+1 is being synthesized.
+
+        Returns the time to the first synthesized chunk and the chunk count.
+        """
+        start_time = time.perf_counter()
+        first_audio_time = None
+        audio_chunks = 0
+
+        # Small bound keeps synthesis at most two chunks ahead of playback
+        send_stream, recv_stream = anyio.create_memory_object_stream(max_buffer_size=2)
+
+        async def produce() -> None:
+            nonlocal first_audio_time
+            async with send_stream:
+                async for chunk, text in self.tts.stream(source):
+                    if first_audio_time is None:
+                        first_audio_time = time.perf_counter() - start_time
+                    await send_stream.send((chunk, text))
+
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(produce)
+            async with recv_stream:
+                async for chunk, text in recv_stream:
+                    audio_chunks += 1
+                    await self.play_and_log(chunk, text, audio_chunks)
+
+        await self.wait_for_playback()
+        return first_audio_time, audio_chunks
 
     async def synthesize_streaming(
         self, text_stream: AsyncIterator[str]
@@ -249,15 +413,7 @@ class InteractiveDemo:
         self.console.print("[blue]🎤 Synthesizing (token-feeding)...[/blue]")
 
         start_time = time.perf_counter()
-        first_audio_time = None
-        audio_chunks = 0
-
-        async for chunk, text in self.tts.stream(text_stream):
-            if first_audio_time is None:
-                first_audio_time = time.perf_counter() - start_time
-
-            audio_chunks += 1
-            await self.play_and_log(chunk, text, audio_chunks)
+        first_audio_time, audio_chunks = await self.stream_and_play(text_stream)
 
         total_time = time.perf_counter() - start_time
         return {
@@ -271,11 +427,7 @@ class InteractiveDemo:
         self.console.print("[blue]🎤 Synthesizing (full-text)...[/blue]")
 
         start_time = time.perf_counter()
-        audio_chunks = 0
-
-        async for chunk, segment_text in self.tts.stream(text):
-            audio_chunks += 1
-            await self.play_and_log(chunk, segment_text, audio_chunks)
+        _, audio_chunks = await self.stream_and_play(text)
 
         total_time = time.perf_counter() - start_time
         return {
@@ -305,6 +457,7 @@ class InteractiveDemo:
             )
 
         await self.play_and_log(chunk, text, 1)
+        await self.wait_for_playback()
 
         return {
             "first_audio_latency": total_time,
@@ -312,8 +465,12 @@ class InteractiveDemo:
             "audio_chunks": 1,
         }
 
-    async def run_performance_test(self):
-        """Run performance comparison on last response."""
+    async def run_performance_test(self, pacing_ms: int = 0):
+        """Run performance comparison on last response.
+
+        ``pacing_ms`` adds a delay between simulated LLM words; the default of
+        0 measures segmenter + engine throughput alone.
+        """
         if not self.last_response:
             self.console.print(
                 "[yellow]No previous response to test. Chat first![/yellow]"
@@ -338,13 +495,15 @@ class InteractiveDemo:
             words = self.last_response.split()
             for i, word in enumerate(words):
                 yield word + (" " if i < len(words) - 1 else "")
-                await anyio.sleep(0.01)
+                if pacing_ms > 0:
+                    await anyio.sleep(pacing_ms / 1000.0)
 
         # Test all modes
         results = {}
-        results["token-feeding"] = await self.synthesize_streaming(
-            simulate_token_stream()
-        )
+        token_mode = "token-feeding"
+        if pacing_ms > 0:
+            token_mode += f" ({pacing_ms} ms/word)"
+        results[token_mode] = await self.synthesize_streaming(simulate_token_stream())
         results["full-text"] = await self.synthesize_full_text(self.last_response)
         results["raw-engine"] = await self.synthesize_raw_engine(self.last_response)
 
@@ -476,8 +635,11 @@ class InteractiveDemo:
                     )
                 elif user_input == "/language":
                     await self.switch_language()
-                elif user_input == "/performance":
-                    await self.run_performance_test()
+                elif user_input.split()[0] == "/performance":
+                    # Optional argument: simulated LLM pacing in ms per word
+                    args = user_input.split()[1:]
+                    pacing_ms = int(args[0]) if args and args[0].isdigit() else 0
+                    await self.run_performance_test(pacing_ms)
                 else:
                     # Regular chat
                     await self.handle_chat(user_input)
@@ -488,6 +650,8 @@ class InteractiveDemo:
             except Exception as e:
                 self.console.print(f"[red]Error: {e}[/red]")
 
+        self.audio_output.close()
+
 
 def main():
     """Entry point for the demo."""
@@ -1,12 +1,23 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
+from functools import lru_cache
+import os
 import shutil
+import sys
 
 import anyio
 
+# ffmpeg work is CPU-bound: cap it at one thread/process per core and keep it
+# off AnyIO's default limiter, which is shared with every other blocking call
+_TRANSCODE_LIMITER = anyio.CapacityLimiter(os.cpu_count() or 1)
 
-@dataclass(frozen=True)
+# Chunks are created per segment; slots drop the per-instance __dict__ and
+# speed up attribute access. dataclass(slots=...) needs Python 3.10+.
+_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+
+@dataclass(frozen=True, **_SLOTS)
 class AudioSpec:
     """Audio format specification."""
 
@@ -16,7 +27,7 @@ class AudioSpec:
     sample_width: int | None = None
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class AudioChunk:
     """Audio data with format specification."""
 
@@ -42,6 +53,11 @@ class AudioTranscoder:
         if chunk.spec == target:
             return chunk
 
+        # Simple PCM reshuffles don't need an ffmpeg process
+        fast = AudioTranscoder.convert_pcm(chunk, target)
+        if fast is not None:
+            return fast
+
         # Try ffmpeg-python first, then fall back to manual ffmpeg
         try:
             import ffmpeg
@@ -81,7 +97,7 @@ class AudioTranscoder:
                     .run_async(pipe_stdin=True, pipe_stdout=True, pipe_stderr=True)
                 )
 
-                stdout, stderr = process.communicate(input=input_data)
+                stdout, stderr = process.communicate(input=memoryview(input_data))
 
                 if process.returncode != 0:
                     raise RuntimeError(f"FFmpeg transcoding failed: {stderr.decode()}")
@@ -90,7 +106,7 @@ class AudioTranscoder:
 
             # Run transcoding in thread pool
             result = await anyio.to_thread.run_sync(
-                do_transcode, chunk.data, chunk.spec, target
+                do_transcode, chunk.data, chunk.spec, target, limiter=_TRANSCODE_LIMITER
             )
             return AudioChunk(result, target)
 
@@ -103,54 +119,162 @@ class AudioTranscoder:
 
         # Fallback: manual ffmpeg (original implementation)
         if AudioTranscoder.is_ffmpeg_available():
-            input_format = AudioTranscoder.get_ffmpeg_format(chunk.spec)
-            output_format = AudioTranscoder.get_ffmpeg_format(target)
+            command = AudioTranscoder.get_ffmpeg_command(chunk.spec, target)
 
-            if input_format and output_format:
+            if command:
                 try:
                     import subprocess
 
-                    process = await anyio.open_process(
-                        [
-                            "ffmpeg",
-                            "-f",
-                            input_format,
-                            "-i",
-                            "pipe:0",
-                            "-f",
-                            output_format,
-                            "-ar",
-                            str(target.sample_rate),
-                            "-ac",
-                            str(target.channels),
-                            "pipe:1",
-                        ],
-                        stdin=subprocess.PIPE,
-                        stdout=subprocess.PIPE,
-                        stderr=subprocess.DEVNULL,
-                    )
-
-                    await process.stdin.send(chunk.data)
-                    await process.stdin.aclose()
-
-                    # Read all output from ffmpeg
-                    result = b""
-                    async for data in process.stdout:
-                        result += data
-
-                    await process.wait()
-
-                    return AudioChunk(result, target)
+                    async with _TRANSCODE_LIMITER:
+                        process = await anyio.open_process(
+                            list(command),
+                            stdin=subprocess.PIPE,
+                            stdout=subprocess.PIPE,
+                            stderr=subprocess.DEVNULL,
+                        )
+
+                        await process.stdin.send(memoryview(chunk.data))
+                        await process.stdin.aclose()
+
+                        # Read all output from ffmpeg into a buffer presized
+                        # from the input duration when that is known; slice
+                        # assignment grows it if ffmpeg produces more
+                        result = bytearray(
+                            AudioTranscoder.estimate_output_size(chunk, target)
+                        )
+                        size = 0
+                        async for data in process.stdout:
+                            result[size : size + len(data)] = data
+                            size += len(data)
+                        del result[size:]
+
+                        await process.wait()
+
+                        return AudioChunk(bytes(result), target)
                 except Exception:
                     pass
 
         raise UnsupportedFormat(chunk.spec, target)
 
+    @staticmethod
+    def convert_pcm(chunk: AudioChunk, target: AudioSpec) -> AudioChunk | None:
+        """Convert PCM sample width and/or mono → multi-channel in-process.
+
+        Returns None when the conversion needs ffmpeg (resampling, codecs).
+        """
+        source = chunk.spec
+        if source.codec != "pcm" or target.codec != "pcm":
+            return None
+        if source.sample_rate != target.sample_rate:
+            return None
+        if source.channels != target.channels and source.channels != 1:
+            return None
+        if source.sample_width not in (16, 24, 32):
+            return None
+        if target.sample_width not in (16, 24, 32):
+            return None
+
+        src_width = source.sample_width // 8
+        dst_width = target.sample_width // 8
+        data = chunk.data
+        if len(data) % (src_width * source.channels):
+            return None
+
+        # Little-endian samples: widening pads low bytes (<< shift), narrowing
+        # keeps the high bytes (>> shift). Strided slice copies run in C.
+        if dst_width != src_width:
+            out = bytearray(len(data) // src_width * dst_width)
+            if dst_width > src_width:
+                pad = dst_width - src_width
+                for k in range(src_width):
+                    out[pad + k :: dst_width] = data[k::src_width]
+            else:
+                drop = src_width - dst_width
+                for k in range(dst_width):
+                    out[k::dst_width] = data[drop + k :: src_width]
+            data = out
+
+        # Duplicate mono samples into every output channel
+        if target.channels != source.channels:
+            frame = dst_width * target.channels
+            out = bytearray(len(data) * target.channels)
+            for channel in range(target.channels):
+                for k in range(dst_width):
+                    out[channel * dst_width + k :: frame] = data[k::dst_width]
+            data = out
+
+        return AudioChunk(bytes(data), target)
+
+    @staticmethod
+    def estimate_output_size(chunk: AudioChunk, target: AudioSpec) -> int:
+        """Estimate converted size in bytes from the input duration, or 0.
+
+        Exact for PCM output; an upper bound (320 kbps) for MP3 output.
+        Compressed input has no cheap duration, so nothing is estimated.
+        """
+        source = chunk.spec
+        if source.codec != "pcm" or not source.sample_width:
+            return 0
+
+        source_rate = source.sample_rate * source.channels * source.sample_width // 8
+        if not source_rate:
+            return 0
+        duration = len(chunk.data) / source_rate
+
+        if target.codec == "pcm" and target.sample_width:
+            return int(
+                duration
+                * target.sample_rate
+                * target.channels
+                * target.sample_width
+                // 8
+            )
+        if target.codec == "mp3":
+            return int(duration * 320_000 // 8)
+        return 0
+
     @staticmethod
     def is_ffmpeg_available() -> bool:
         """Check if ffmpeg binary is available."""
         return shutil.which("ffmpeg") is not None
 
+    @staticmethod
+    @lru_cache(maxsize=32)
+    def get_ffmpeg_command(source: AudioSpec, target: AudioSpec) -> tuple[str, ...]:
+        """Build the ffmpeg pipe command for a conversion, or () if unsupported.
+
+        Each chunk is short, so stream analysis is skipped: raw PCM input is
+        fully described by the arguments, and compressed input carries its
+        parameters in the first frame header.
+        """
+        input_format = AudioTranscoder.get_ffmpeg_format(source)
+        output_format = AudioTranscoder.get_ffmpeg_format(target)
+        if not input_format or not output_format:
+            return ()
+
+        input_args = ["-f", input_format]
+        if source.codec == "pcm":
+            input_args += ["-ar", str(source.sample_rate), "-ac", str(source.channels)]
+
+        return (
+            "ffmpeg",
+            "-hide_banner",
+            "-loglevel",
+            "error",
+            "-analyzeduration",
+            "0",
+            *input_args,
+            "-i",
+            "pipe:0",
+            "-f",
+            output_format,
+            "-ar",
+            str(target.sample_rate),
+            "-ac",
+            str(target.channels),
+            "pipe:1",
+        )
+
     @staticmethod
     def get_ffmpeg_format(spec: AudioSpec) -> str | None:
         """Get ffmpeg format string for AudioSpec."""
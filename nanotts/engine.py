@@ -1,23 +1,100 @@
 from __future__ import annotations
 
+from collections import OrderedDict
+import functools
+import hashlib
 from typing import Callable, Protocol
 
 import anyio
 
 from .audio_data import AudioChunk, AudioSpec
 
+# Per-engine number of synthesized segments kept for exact-repeat replay
+SYNTH_CACHE_SIZE = 256
+
 
 class Engine(Protocol):
+    # Engines that gain from multi-segment inference set this and override
+    # ``synth_batch``; NanoTTS then groups segments that arrive close together
+    supports_batch: bool = False
+
     async def synth(
         self, text: str, *, target: AudioSpec | None = None
     ) -> AudioChunk: ...
 
+    async def synth_batch(
+        self, texts: list[str], *, target: AudioSpec | None = None
+    ) -> list[AudioChunk]:
+        return [await self.synth(text, target=target) for text in texts]
+
+
+def cached_synth(method):
+    """Memoize an engine's ``synth`` per instance in a small LRU.
+
+    Keys are a 16-byte digest of the text plus the target spec, so long
+    segments don't stay alive as cache keys. Engines whose output also
+    depends on mutable settings (voice, rate, ...) return them from a
+    ``_cache_key_extra()`` method, which joins the key. The LRU holds
+    ``self._synth_cache_size`` entries if the engine sets it (0 disables
+    caching), else ``SYNTH_CACHE_SIZE``.
+    """
+
+    @functools.wraps(method)
+    async def synth(self, text: str, *, target: AudioSpec | None = None) -> AudioChunk:
+        size = getattr(self, "_synth_cache_size", SYNTH_CACHE_SIZE)
+        if size <= 0:
+            return await method(self, text, target=target)
+
+        cache = getattr(self, "_synth_cache", None)
+        if cache is None:
+            cache = self._synth_cache = OrderedDict()
+
+        key_extra = getattr(self, "_cache_key_extra", None)
+        key = (
+            hashlib.blake2b(text.encode(), digest_size=16).digest(),
+            target,
+            key_extra() if key_extra is not None else None,
+        )
+        chunk = cache.get(key)
+        if chunk is None:
+            chunk = await method(self, text, target=target)
+            cache[key] = chunk
+            if len(cache) > size:
+                cache.popitem(last=False)
+        else:
+            cache.move_to_end(key)
+
+        # Fresh wrapper so callers can't swap data/spec on the cached chunk
+        return AudioChunk(chunk.data, chunk.spec)
+
+    return synth
+
+
+def clear_synth_cache(engine: Engine) -> None:
+    """Forget every segment memoized by ``cached_synth`` on ``engine``."""
+    cache = getattr(engine, "_synth_cache", None)
+    if cache is not None:
+        cache.clear()
+
 
 class CallableEngine(Engine):
-    def __init__(self, fn: Callable[[str], bytes], *, output_spec: AudioSpec):
+    def __init__(
+        self,
+        fn: Callable[[str], bytes],
+        *,
+        output_spec: AudioSpec,
+        cache_size: int = SYNTH_CACHE_SIZE,
+    ):
         self._fn = fn
         self._output_spec = output_spec
+        # Segments memoized for exact-repeat replay; 0 turns this off for
+        # callables that are nondeterministic or stateful
+        self._synth_cache_size = cache_size
 
+    @cached_synth
     async def synth(self, text: str, *, target: AudioSpec | None = None) -> AudioChunk:
         audio_bytes = await anyio.to_thread.run_sync(self._fn, text)
         return AudioChunk(audio_bytes, self._output_spec)
+
+    def cache_clear(self) -> None:
+        clear_synth_cache(self)
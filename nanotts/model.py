@@ -1,11 +1,14 @@
 from __future__ import annotations
 
-import asyncio
-from collections.abc import Awaitable
+from collections.abc import Awaitable, Iterable
 from dataclasses import dataclass
+import importlib
+import importlib.util
 from pathlib import Path
 from typing import Callable
 
+import anyio
+
 from .engine import Engine
 
 CACHE_DIR = Path.home() / ".cache" / "nano_tts"
@@ -13,33 +16,83 @@ CACHE_DIR = Path.home() / ".cache" / "nano_tts"
 
 @dataclass
 class EngineFactory:
-    build: Callable[..., Awaitable[Engine]]
+    build: Callable[..., Awaitable[Engine]] | None
     doc: str
+    # "package.module:attr" of the build function, imported on first use
+    target: str = ""
+
+    def load(self) -> Callable[..., Awaitable[Engine]]:
+        if self.build is None:
+            module_name, _, attr = self.target.partition(":")
+            self.build = getattr(importlib.import_module(module_name), attr)
+        return self.build
 
 
 class ModelManager:
     def __init__(self):
         self._factories: dict[str, EngineFactory] = {}
-        self._download_locks: dict[str, asyncio.Lock] = {}
+        self._download_locks: dict[str, anyio.Lock] = {}
+        self._engine_cache: dict[tuple[str, frozenset], Engine] = {}
+        self._build_locks: dict[tuple[str, frozenset], anyio.Lock] = {}
 
     def register(
         self, name: str, build: Callable[..., Awaitable[Engine]], doc: str = ""
     ) -> None:
         self._factories[name] = EngineFactory(build, doc)
 
+    def register_lazy(
+        self, name: str, target: str, doc: str = "", *, requires: Iterable[str] = ()
+    ) -> None:
+        """Register a build function by "module:attr" path without importing it.
+
+        The module is imported on the first get(). The model is only listed
+        when every module in requires is installed, which is checked without
+        importing them.
+        """
+        if all(importlib.util.find_spec(module) is not None for module in requires):
+            self._factories[name] = EngineFactory(None, doc, target)
+
     async def get(self, name: str = "dummy", **engine_kwargs) -> Engine:
         if name not in self._factories:
             raise ValueError(f"Unknown model: {name}")
 
-        factory = self._factories[name]
-        return await factory.build(**engine_kwargs)
+        build = self._factories[name].load()
+
+        # Engines are reused per (model, kwargs); unhashable kwargs skip the cache
+        try:
+            key = (name, frozenset(engine_kwargs.items()))
+            hash(key)
+        except TypeError:
+            return await build(**engine_kwargs)
+
+        if key in self._engine_cache:
+            return self._engine_cache[key]
+
+        if key not in self._build_locks:
+            self._build_locks[key] = anyio.Lock()
+
+        async with self._build_locks[key]:
+            if key not in self._engine_cache:
+                self._engine_cache[key] = await build(**engine_kwargs)
+            return self._engine_cache[key]
+
+    async def close(self) -> None:
+        """Drop cached engines, closing any that hold resources."""
+        engines = list(self._engine_cache.values())
+        self._engine_cache.clear()
+        self._build_locks.clear()
+
+        for engine in engines:
+            close = getattr(engine, "close", None)
+            if close is not None:
+                await close()
 
     def list_models(self) -> dict[str, str]:
         return {name: factory.doc for name, factory in self._factories.items()}
 
     async def download_model(self, name: str, url: str) -> None:
         if name not in self._download_locks:
-            self._download_locks[name] = asyncio.Lock()
+            self._download_locks[name] = anyio.Lock()
 
         async with self._download_locks[name]:
             cache_path = CACHE_DIR / name
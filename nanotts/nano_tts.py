@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 from collections.abc import AsyncIterable, AsyncIterator, Awaitable, Callable, Iterable
+import heapq
 from typing import Union
 
 import anyio
@@ -8,7 +9,68 @@ import anyio
 from .audio_data import AudioChunk, AudioSpec, AudioTranscoder
 from .engine import Engine
 from .model import manager
-from .segmenter import Segment, Segmenter, StreamToken
+from .segmenter import SEPARATOR_CHAR, Segment, Segmenter, StreamToken
+
+# Upper bound on how many queued LLM tokens are merged into one feed chunk
+COALESCE_MAX_TOKENS = 8
+
+# Batching engines get up to this many segments that arrive within the window
+MAX_SYNTH_BATCH = 8
+BATCH_WINDOW_S = 0.01
+
+
+class _CoalescedTokens:
+    """Async iterator that joins every token already queued into one string.
+
+    With hold_s, it also waits up to that long for more tokens, unless the
+    latest token holds separator punctuation.
+
+    Receiving from a memory stream is cancel-safe, so the segmenter's timeout
+    can interrupt a wait without losing or closing the upstream iterator.
+    """
+
+    def __init__(
+        self, recv_stream: anyio.abc.ObjectReceiveStream[str], hold_s: float = 0.0
+    ):
+        self._recv_stream = recv_stream
+        self._hold_s = hold_s
+
+    def __aiter__(self) -> _CoalescedTokens:
+        return self
+
+    async def __anext__(self) -> str:
+        try:
+            parts = [await self._recv_stream.receive()]
+        except anyio.EndOfStream:
+            raise StopAsyncIteration from None
+
+        deadline = anyio.current_time() + self._hold_s
+        while len(parts) < COALESCE_MAX_TOKENS:
+            try:
+                parts.append(self._recv_stream.receive_nowait())
+            except anyio.EndOfStream:
+                break
+            except anyio.WouldBlock:
+                # A separator lets the segmenter emit now, so don't hold it
+                if not self._hold_s or SEPARATOR_CHAR.search(parts[-1]):
+                    break
+                token = await self._receive_until(deadline)
+                if token is None:
+                    break
+                parts.append(token)
+
+        return "".join(parts)
+
+    async def _receive_until(self, deadline: float) -> str | None:
+        """Receive a token before deadline, or None if none arrives."""
+        # Shielded so an outer timeout can't drop the tokens already taken;
+        # it is delayed by at most the hold window
+        with anyio.CancelScope(deadline=deadline, shield=True):
+            try:
+                return await self._recv_stream.receive()
+            except anyio.EndOfStream:
+                return None
+        return None
 
 
 class NanoTTS:
@@ -22,6 +84,11 @@ class NanoTTS:
         min_tokens: int = 10,
         max_tokens: int = 50,
         pre_hook: Callable[[str], Awaitable[str]] | None = None,
+        segment_buffer: int = 4,
+        audio_buffer: int = 4,
+        concurrent_synth: bool = False,
+        synth_workers: int = 2,
+        coalesce_ms: int = 0,
         **engine_kwargs,
     ):
         if engine is None and model is None:
@@ -38,6 +105,18 @@ class NanoTTS:
         self._min_tokens = min_tokens
         self._max_tokens = max_tokens
         self._pre_hook = pre_hook
+        # Bounded queues give backpressure: at most this many text segments
+        # wait for synthesis, and this many synthesized chunks (the bulk of
+        # memory) wait for the consumer
+        self._segment_buffer = max(1, segment_buffer)
+        self._audio_buffer = max(1, audio_buffer)
+        # Only needed when segments can finish out of order (parallel synthesis)
+        self._concurrent_synth = concurrent_synth
+        # Workers synthesizing at once; a single worker finishes in order
+        self._synth_workers = max(1, synth_workers) if concurrent_synth else 1
+        # How long the first token of a feed chunk waits for more tokens;
+        # 0 only joins tokens that are already queued
+        self._coalesce_s = coalesce_ms / 1000.0
         self._token: StreamToken | None = None
 
     def cancel(self) -> None:
@@ -53,19 +132,55 @@ class NanoTTS:
             self._engine = await manager.get(self._model, **self._engine_kwargs)
 
         segment_send, segment_recv = anyio.create_memory_object_stream(
-            max_buffer_size=64
+            max_buffer_size=self._segment_buffer
+        )
+        audio_send, audio_recv = anyio.create_memory_object_stream(
+            max_buffer_size=self._audio_buffer
         )
-        audio_send, audio_recv = anyio.create_memory_object_stream(max_buffer_size=64)
 
         async with anyio.create_task_group() as tg:
-            tg.start_soon(self._segment_producer, text_or_iter, segment_send)
-            tg.start_soon(self._tts_worker, segment_recv, audio_send)
+            tg.start_soon(
+                self._pipeline, text_or_iter, segment_send, segment_recv, audio_send
+            )
+
+            if self._concurrent_synth:
+                results = self._reorder_consumer(audio_recv)
+            else:
+                # A single worker finishes segments in order: pass them through
+                results = self._ordered_consumer(audio_recv)
 
-            async for audio_chunk, text in self._reorder_consumer(audio_recv):
+            async for audio_chunk, text in results:
                 if self._token.cancelled():
+                    tg.cancel_scope.cancel()
                     return
                 yield audio_chunk, text
 
+    async def _pipeline(
+        self,
+        text_or_iter: Union[str, Iterable[str], AsyncIterable[str]],
+        segment_send: anyio.abc.ObjectSendStream[Segment],
+        segment_recv: anyio.abc.ObjectReceiveStream[Segment],
+        audio_send: anyio.abc.ObjectSendStream[tuple[int, AudioChunk | None, str]],
+    ) -> None:
+        """Run segmentation and synthesis until done or cancelled.
+
+        cancel() cancels this task's scope, so segmentation, synthesis and
+        sends blocked on either unwind at their next checkpoint. The scope
+        never spans stream()'s yield: cancel() called by the consumer must
+        not cancel the consumer's own task.
+        """
+        with self._token.cancel_scope():
+            async with anyio.create_task_group() as tg:
+                tg.start_soon(self._segment_producer, text_or_iter, segment_send)
+                # Each worker holds its own clones; the audio stream ends once
+                # the last worker closes its clone
+                for _ in range(self._synth_workers):
+                    tg.start_soon(
+                        self._tts_worker, segment_recv.clone(), audio_send.clone()
+                    )
+                segment_recv.close()
+                audio_send.close()
+
     async def _segment_producer(
         self,
         text_or_iter: Union[str, Iterable[str], AsyncIterable[str]],
@@ -80,43 +195,135 @@ class NanoTTS:
                 max_tokens=self._max_tokens,
                 token=self._token,
             )
-            await segmenter.feed(text_or_iter)
+            if isinstance(text_or_iter, str) or not hasattr(text_or_iter, "__aiter__"):
+                await segmenter.feed(text_or_iter)
+                return
+
+            # Pump tokens into a buffer so bursts reach the segmenter as one chunk
+            token_send, token_recv = anyio.create_memory_object_stream(
+                max_buffer_size=64
+            )
+            async with anyio.create_task_group() as tg:
+                tg.start_soon(self._token_pump, text_or_iter, token_send)
+                await segmenter.feed(_CoalescedTokens(token_recv, self._coalesce_s))
+                tg.cancel_scope.cancel()
         except anyio.get_cancelled_exc_class():
             pass
         finally:
             await send_stream.aclose()
 
+    async def _token_pump(
+        self,
+        text_iter: AsyncIterable[str],
+        send_stream: anyio.abc.ObjectSendStream[str],
+    ) -> None:
+        async with send_stream:
+            async for token in text_iter:
+                if self._token.cancelled():
+                    break
+                await send_stream.send(token)
+
     async def _tts_worker(
         self,
         recv_stream: anyio.abc.ObjectReceiveStream[Segment],
-        send_stream: anyio.abc.ObjectSendStream[tuple[int, AudioChunk, str]],
+        send_stream: anyio.abc.ObjectSendStream[tuple[int, AudioChunk | None, str]],
     ) -> None:
+        batching = getattr(self._engine, "supports_batch", False)
+
         try:
             async for segment in recv_stream:
                 if self._token.cancelled():
                     break
 
-                try:
-                    raw_chunk = await self._engine.synth(
-                        segment.text, target=self._output_spec
-                    )
-                    final_chunk = await AudioTranscoder.convert(
-                        raw_chunk, self._output_spec
-                    )
-                    await send_stream.send((segment.id, final_chunk, segment.text))
-                except Exception:
-                    # Skip failed segments
-                    continue
+                # The first segment always goes out alone to keep first audio fast
+                batch = [segment]
+                if batching and segment.id > 0:
+                    batch += await self._gather_batch(recv_stream, segment)
+
+                # Failed segments come back as None; their ids are still passed
+                # on so the reorder consumer doesn't wait for them
+                chunks = await self._synthesize(batch)
+                for item, chunk in zip(batch, chunks):
+                    await send_stream.send((item.id, chunk, item.text))
         except anyio.get_cancelled_exc_class():
             pass
         finally:
             await send_stream.aclose()
 
+    async def _synthesize(self, batch: list[Segment]) -> list[AudioChunk | None]:
+        """Synthesize a batch in the output format; None marks a failed segment."""
+        chunks: list[AudioChunk | None] = [None] * len(batch)
+        try:
+            if len(batch) > 1:
+                raw_chunks = await self._engine.synth_batch(
+                    [item.text for item in batch], target=self._output_spec
+                )
+            else:
+                raw_chunks = [
+                    await self._engine.synth(batch[0].text, target=self._output_spec)
+                ]
+
+            for index, raw_chunk in enumerate(raw_chunks[: len(batch)]):
+                # Engines that honor target already match the output
+                if raw_chunk.spec == self._output_spec:
+                    chunks[index] = raw_chunk
+                else:
+                    chunks[index] = await AudioTranscoder.convert(
+                        raw_chunk, self._output_spec
+                    )
+        except Exception:
+            # Skip failed segments
+            pass
+        return chunks
+
+    async def _gather_batch(
+        self, recv_stream: anyio.abc.ObjectReceiveStream[Segment], first: Segment
+    ) -> list[Segment]:
+        """Collect segments for a batch with first, up to the limit.
+
+        Segments already queued are taken at once. Later ones are waited
+        for only until the batch window, measured from when first was
+        emitted, runs out: a segment that waited in the queue doesn't wait
+        again, and a finished stream isn't waited on at all.
+        """
+        extra: list[Segment] = []
+        while len(extra) < MAX_SYNTH_BATCH - 1:
+            try:
+                extra.append(recv_stream.receive_nowait())
+            except anyio.EndOfStream:
+                return extra
+            except anyio.WouldBlock:
+                break
+
+        with anyio.CancelScope(deadline=first.emitted_at + BATCH_WINDOW_S):
+            while len(extra) < MAX_SYNTH_BATCH - 1:
+                try:
+                    extra.append(await recv_stream.receive())
+                except anyio.EndOfStream:
+                    break
+        return extra
+
+    async def _ordered_consumer(
+        self,
+        recv_stream: anyio.abc.ObjectReceiveStream[tuple[int, AudioChunk | None, str]],
+    ) -> AsyncIterator[tuple[AudioChunk, str]]:
+        try:
+            async for _, audio_chunk, text in recv_stream:
+                if self._token.cancelled():
+                    return
+                if audio_chunk is not None:
+                    yield audio_chunk, text
+        except anyio.get_cancelled_exc_class():
+            pass
+
     async def _reorder_consumer(
-        self, recv_stream: anyio.abc.ObjectReceiveStream[tuple[int, AudioChunk, str]]
+        self,
+        recv_stream: anyio.abc.ObjectReceiveStream[tuple[int, AudioChunk | None, str]],
     ) -> AsyncIterator[tuple[AudioChunk, str]]:
         expected_id = 0
-        pending: dict[int, tuple[AudioChunk, str]] = {}
+        # Min-heap of out-of-order segments; ids are unique so the chunk is
+        # never compared. A None chunk is a failed segment to skip.
+        pending: list[tuple[int, AudioChunk | None, str]] = []
 
         try:
             async for segment_id, audio_chunk, text in recv_stream:
@@ -124,15 +331,17 @@ class NanoTTS:
                     return
 
                 if segment_id == expected_id:
-                    yield audio_chunk, text
+                    if audio_chunk is not None:
+                        yield audio_chunk, text
                     expected_id += 1
 
                     # Check if we can yield any pending segments
-                    while expected_id in pending:
-                        audio_chunk, text = pending.pop(expected_id)
-                        yield audio_chunk, text
+                    while pending and pending[0][0] == expected_id:
+                        _, audio_chunk, text = heapq.heappop(pending)
+                        if audio_chunk is not None:
+                            yield audio_chunk, text
                         expected_id += 1
                 else:
-                    pending[segment_id] = (audio_chunk, text)
+                    heapq.heappush(pending, (segment_id, audio_chunk, text))
         except anyio.get_cancelled_exc_class():
             pass
@@ -1,9 +1,16 @@
-# Import all plugins to register them
-from . import dummy
+from ..model import manager
 
-# Import edge plugin if available
-try:
-    from . import edge
-except ImportError:
-    # edge-tts not installed
-    pass
+# Plugins are registered by import path and imported on first use, so listing
+# models doesn't load optional backends like edge-tts
+manager.register_lazy(
+    "dummy",
+    f"{__name__}.dummy:build_dummy",
+    "dummy: simple test engine that returns predictable audio data",
+)
+
+manager.register_lazy(
+    "edge",
+    f"{__name__}.edge:build_edge",
+    "edge: voice=<voice_name>, rate=<±N%>, volume=<±N%>, pitch=<±NHz> (Microsoft Edge TTS)",
+    requires=("edge_tts",),
+)
@@ -7,11 +7,12 @@ No API key required.
 
 from __future__ import annotations
 
+from collections.abc import AsyncIterator
+
 import edge_tts
 
 from ..audio_data import AudioChunk, AudioSpec
-from ..engine import Engine
-from ..model import manager
+from ..engine import Engine, cached_synth, clear_synth_cache
 
 
 class EdgeEngine(Engine):
@@ -30,29 +31,44 @@ class EdgeEngine(Engine):
         # Edge-TTS outputs MP3 format
         self._output_spec = AudioSpec("mp3", 24000, 1, None)
 
+    @cached_synth
     async def synth(self, text: str, *, target: AudioSpec | None = None) -> AudioChunk:
         """Synthesize text using Edge-TTS."""
         if not text.strip():
             return AudioChunk(b"", self._output_spec)
 
+        # Collect parts and join once, since bytes += would copy everything
+        # received so far on every chunk
+        parts = [chunk.data async for chunk in self.stream(text)]
+        return AudioChunk(b"".join(parts), self._output_spec)
+
+    async def stream(self, text: str) -> AsyncIterator[AudioChunk]:
+        """Yield MP3 audio pieces as Edge-TTS delivers them."""
+        if not text.strip():
+            return
+
         try:
             # Create communicate object with voice settings
             communicate = edge_tts.Communicate(
                 text, self.voice, rate=self.rate, volume=self.volume, pitch=self.pitch
             )
 
-            # Generate audio data
-            audio_data = b""
             async for chunk in communicate.stream():
                 if chunk["type"] == "audio":
-                    audio_data += chunk["data"]
-
-            return AudioChunk(audio_data, self._output_spec)
+                    yield AudioChunk(chunk["data"], self._output_spec)
 
         except Exception as e:
             # Handle network errors, service unavailable, etc.
             raise RuntimeError(f"Edge-TTS synthesis failed: {e}") from e
 
+    def _cache_key_extra(self) -> tuple[str, str, str, str]:
+        # The voice settings are public and may change between calls; cached
+        # audio is only reused for the settings it was made with
+        return (self.voice, self.rate, self.volume, self.pitch)
+
+    def cache_clear(self) -> None:
+        clear_synth_cache(self)
+
 
 async def build_edge(
     *,
@@ -64,11 +80,3 @@ async def build_edge(
 ) -> EdgeEngine:
     """Build Edge-TTS engine with specified parameters."""
     return EdgeEngine(voice=voice, rate=rate, volume=volume, pitch=pitch)
-
-
-# Register the edge engine
-manager.register(
-    "edge",
-    build_edge,
-    "edge: voice=<voice_name>, rate=<±N%>, volume=<±N%>, pitch=<±NHz> (Microsoft Edge TTS)",
-)
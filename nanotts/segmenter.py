@@ -1,15 +1,22 @@
 from __future__ import annotations
 
-from collections.abc import AsyncIterable, Awaitable, Callable, Iterable
+import bisect
+from collections.abc import AsyncIterable, Awaitable, Callable, Iterable, Iterator
+from contextlib import contextmanager
 from dataclasses import dataclass
+from functools import cache
+from itertools import accumulate
 import re
-from typing import Union
+from typing import TYPE_CHECKING, Union
 
 import anyio
-import tiktoken
 
+from .audio_data import _SLOTS
 from .utils import clean_markdown, preprocess_text
 
+if TYPE_CHECKING:
+    import tiktoken
+
 # Tiered separator approach for natural breaking
 # Tier 1: Strong punctuation - preferred break points
 TIER1_SEPARATORS = re.compile(r"[。！？!?…](?=\s|$)|\.(?=\s+[A-Z])|\.(?=\s*$)|\n+")
@@ -17,22 +24,119 @@ TIER1_SEPARATORS = re.compile(r"[。！？!?…](?=\s|$)|\.(?=\s+[A-Z])|\.(?=\s*
 # Tier 2: Soft punctuation - fallback when approaching max tokens
 TIER2_SEPARATORS = re.compile(r",\s+")
 
+# Both tiers in one pass, classified by group name. Tier 2 stops short of a
+# newline so a ",\n" run is still seen as a tier 1 newline break.
+SEPARATORS = re.compile(
+    r"(?P<t1>[。！？!?…](?=\s|$)|\.(?=\s+[A-Z])|\.(?=\s*$)|\n+)|(?P<t2>,[^\S\n]+)"
+)
+
+# Every SEPARATORS match starts with one of these characters
+SEPARATOR_CHARS = frozenset("。！？!?….,\n")
+
+# The same characters as one class, so the first candidate is found by a
+# single C-level search without slicing; the compiled class is a bitmap
+# lookup for ASCII text
+SEPARATOR_CHAR = re.compile(r"[。！？!?….,\n]")
+
+# Tier 1 punctuation that ends a sentence when the text ends right after it
+SENTENCE_STOPS = frozenset("。！？!?….")
+
+NON_SPACE = re.compile(r"\S")
+
+# Word boundaries for a smart break when no separator is available
+SMART_BREAK_CHARS = " ,;:-—–"
+
+# Whitespace a forced break may end on, checked once per candidate token
+WORD_BREAK_CHARS = frozenset(" \n\t")
+
+# Emitted text is skipped with a cursor; drop it from the buffer once the
+# skipped prefix reaches this many characters
+COMPACT_THRESHOLD = 64 * 1024
+
 # Combined pattern for backward compatibility
 SENTENCE_ENDINGS = re.compile(r"[。！？!?…](?=\s|$)|\.(?=\s+[A-Z])|\.(?=\s*$)|,\s+|\n+")
 
 
-@dataclass
+@cache
+def _get_encoder(name: str = "cl100k_base") -> tiktoken.Encoding:
+    """Load a tiktoken encoding once per process.
+
+    tiktoken is imported on first use, so importing nanotts doesn't load it.
+    """
+    import tiktoken
+
+    return tiktoken.get_encoding(name)
+
+
+def _scan_for_break(
+    buf: str, start: int, threshold: int, allow_tier2: bool, limit: int | None = None
+) -> int:
+    """Return the first separator end after threshold in buf[start:], or 0.
+
+    Tier 1 matches win; the first Tier 2 match is the fallback when allowed.
+    Matches ending past limit are ignored.
+    Kept free of segmenter state so the scan stays a plain function of its
+    arguments.
+    """
+    # Mid-sentence buffers usually hold no separator at all, and a character
+    # class search is much cheaper than running the separator regex; when
+    # there is one, the regex starts from it
+    first = SEPARATOR_CHAR.search(buf, start, len(buf) if limit is None else limit)
+    if first is None:
+        return 0
+
+    fallback = 0
+    for match in SEPARATORS.finditer(buf, first.start()):
+        end_pos = match.end()
+        if end_pos <= threshold:
+            continue
+        if limit is not None and end_pos > limit:
+            break
+        if match.lastgroup == "t1":
+            return end_pos
+        if allow_tier2 and not fallback:
+            fallback = end_pos
+
+    return fallback
+
+
+@dataclass(**_SLOTS)
 class Segment:
     id: int
     text: str
+    # anyio.current_time() when the segmenter emitted it
+    emitted_at: float = 0.0
 
 
 class StreamToken:
+    __slots__ = ("_cancelled", "_scopes")
+
     def __init__(self):
         self._cancelled = False
+        # Scopes entered through cancel_scope(); cancel() cancels them so
+        # blocked sends, tokenizer work and synthesis unwind at their next
+        # checkpoint instead of at the next flag check
+        self._scopes: list[anyio.CancelScope] = []
 
     def cancel(self) -> None:
         self._cancelled = True
+        for scope in self._scopes:
+            scope.cancel()
+
+    @contextmanager
+    def cancel_scope(self) -> Iterator[anyio.CancelScope]:
+        """Enter a CancelScope that cancel() cancels, even if already called.
+
+        The cancellation is absorbed when the scope exits.
+        """
+        with anyio.CancelScope() as scope:
+            if self._cancelled:
+                scope.cancel()
+            self._scopes.append(scope)
+            try:
+                yield scope
+            finally:
+                self._scopes.remove(scope)
 
     def cancelled(self) -> bool:
         return self._cancelled
@@ -54,6 +158,8 @@ class Segmenter:
         token: StreamToken,
     ):
         self._send_stream = send_stream
+        # Memory object streams can take a segment without a checkpoint
+        self._send_nowait = getattr(send_stream, "send_nowait", None)
         self._pre_hook = pre_hook
         self._timeout_ms = timeout_ms / 1000.0
         self._min_tokens = min_tokens
@@ -61,59 +167,64 @@ class Segmenter:
         self._token = token
 
         # Initialize tiktoken encoder (GPT-4 encoding)
-        self._encoder = tiktoken.get_encoding("cl100k_base")
-
-        # Segmentation state
-        self._buf = ""
+        self._encoder = _get_encoder("cl100k_base")
+
+        # Segmentation state; tokens and their buffer offsets are cached so
+        # each input chunk is encoded once. Emitted text is skipped with the
+        # _buf_start/_tok_start cursors instead of being sliced off.
+        self._buf_parts: list[str] = []
+        self._buf_len = 0
+        self._buf_start = 0
+        # No separator match can start before this offset: the unemitted text
+        # up to here holds none of SEPARATOR_CHARS, so scans resume from it
+        self._scan_start = 0
+        self._tokens: list[int] = []
+        self._token_offsets: list[int] = []
+        self._tok_start = 0
         self._segment_id = 0
 
     async def feed(
         self, text_or_iter: Union[str, Iterable[str], AsyncIterable[str]]
     ) -> None:
-        if isinstance(text_or_iter, str):
-            await self._process_string(text_or_iter)
-        elif hasattr(text_or_iter, "__aiter__"):
-            await self._process_async_iter_with_timeout(text_or_iter)
-        else:
-            for chunk in text_or_iter:
-                await self._process_string_with_timeout(chunk)
-                if self._token.cancelled():
-                    return
+        # Cancelling the token unwinds a feed blocked on a full segment stream
+        with self._token.cancel_scope():
+            if isinstance(text_or_iter, str):
+                await self._process_string(text_or_iter)
+            elif hasattr(text_or_iter, "__aiter__"):
+                await self._process_async_iter_with_timeout(text_or_iter)
+            else:
+                for chunk in text_or_iter:
+                    await self._process_string(chunk)
+                    if self._token.cancelled():
+                        return
 
-        await self.flush()
+            await self.flush()
 
     async def _process_async_iter_with_timeout(self, text_iter) -> None:
         """Process async iterator with proper timeout logic."""
         # Use iter() for Python 3.9 compatibility
         async_iter = text_iter.__aiter__()
 
-        while True:
-            if self._token.cancelled():
-                return
-
+        while not self._token.cancelled():
             try:
-                # Wait for next chunk with timeout
-                with anyio.move_on_after(self._timeout_ms):
+                # Wait for next chunk with timeout. Only the wait is timed:
+                # processing may block on a full segment stream, and a timeout
+                # there would drop the segment being sent.
+                with anyio.move_on_after(self._timeout_ms) as scope:
                     chunk = await async_iter.__anext__()
-                    # Process the chunk immediately
-                    await self._process_string_with_timeout(chunk)
-                    continue
-
-                # Timeout occurred - emit current buffer if it has content
-                if self._buf:
-                    await self._emit()
-                    continue
-                else:
-                    # No content to emit and timeout - we're done
-                    break
-
             except StopAsyncIteration:
                 # Iterator exhausted
                 break
 
-    async def _process_string_with_timeout(self, text: str) -> None:
-        """Process string with timeout handling - now using token-based logic."""
-        await self._process_string(text)
+            if not scope.cancelled_caught:
+                # Process the chunk immediately
+                await self._process_string(chunk)
+            elif self._buf_len > self._buf_start:
+                # Timeout occurred - emit current buffer if it has content
+                await self._emit()
+            else:
+                # No content to emit and timeout - we're done
+                break
 
     async def _process_string(self, text: str) -> None:
         """Process string with token-based segmentation."""
@@ -129,170 +240,282 @@ class Segmenter:
         if processed_text is None:  # Only skip if preprocessing returns None
             return
 
-        self._buf += processed_text
+        self._append(processed_text)
 
         # Check for segmentation opportunities
         await self._check_and_segment()
 
-    async def _check_and_segment(self) -> None:
-        """Check if buffer should be segmented using tiered separator approach."""
-        if not self._buf.strip():
+    def _append(self, text: str) -> None:
+        """Append text to the buffer, encoding only the new text."""
+        # Input is plain text: special-token strings like "<|endoftext|>" are
+        # counted as ordinary text rather than rejected
+        tokens = self._encoder.encode_ordinary(text)
+        if len(tokens) == 1:
+            # Typical for LLM token streams; skip the per-byte offset walk
+            offsets = [0]
+        elif text.isascii():
+            # One byte per character: offsets are the running token lengths,
+            # with no per-byte walk or decode of text we already have
+            lengths = map(len, self._encoder.decode_tokens_bytes(tokens))
+            offsets = list(accumulate(lengths, initial=0))
+            offsets.pop()
+        else:
+            _, offsets = self._encoder.decode_with_offsets(tokens)
+        base = self._buf_len
+        if self._scan_start == base and SEPARATOR_CHAR.search(text) is None:
+            self._scan_start = base + len(text)
+        self._tokens.extend(tokens)
+        self._token_offsets.extend(base + offset for offset in offsets)
+        self._buf_parts.append(text)
+        self._buf_len += len(text)
+
+    @property
+    def _buf(self) -> str:
+        """The buffered text, joined from its parts only when read.
+
+        Includes already emitted text before _buf_start.
+        """
+        if len(self._buf_parts) > 1:
+            self._buf_parts = ["".join(self._buf_parts)]
+        return self._buf_parts[0] if self._buf_parts else ""
+
+    def _clear_buffer(self) -> None:
+        """Drop the buffer and its cached tokens."""
+        self._buf_parts = []
+        self._buf_len = 0
+        self._buf_start = 0
+        self._scan_start = 0
+        self._tokens = []
+        self._token_offsets = []
+        self._tok_start = 0
+
+    def _consume(self, end: int) -> None:
+        """Advance the buffer start to end, past text that has been emitted."""
+        if end >= self._buf_len:
+            self._clear_buffer()
             return
 
-        # Get current token count
-        current_tokens = len(self._encoder.encode(self._buf))
-
-        # Force segmentation if we hit max tokens
-        if current_tokens >= self._max_tokens:
-            await self._emit_with_token_boundary()
-            return
+        # A token straddling end stays in the remainder, as it would if the
+        # remaining text were re-encoded
+        self._buf_start = end
+        self._scan_start = max(self._scan_start, end)
+        self._tok_start = (
+            bisect.bisect_right(self._token_offsets, end, self._tok_start) - 1
+        )
+
+        # Compact once the skipped prefix gets large
+        if end >= COMPACT_THRESHOLD:
+            base = end
+            self._buf_parts = [self._buf[base:]]
+            self._buf_len -= base
+            self._buf_start = 0
+            self._scan_start -= base
+            self._tokens = self._tokens[self._tok_start :]
+            self._token_offsets = [
+                max(offset - base, 0)
+                for offset in self._token_offsets[self._tok_start :]
+            ]
+            self._tok_start = 0
+
+    @property
+    def _token_count(self) -> int:
+        """Tokens in the unemitted text, from the cache kept by _append."""
+        return len(self._tokens) - self._tok_start
+
+    def _has_content(self) -> bool:
+        """Whether the unemitted text has anything besides whitespace."""
+        return NON_SPACE.search(self._buf, self._buf_start) is not None
+
+    def _char_offset(self, token_index: int) -> int:
+        """Buffer offset where the token at token_index starts (or the end).
+
+        token_index counts from the first unemitted token.
+        """
+        token_index += self._tok_start
+        if token_index < len(self._token_offsets):
+            return max(self._token_offsets[token_index], self._buf_start)
+        return self._buf_len
 
-        # Tiered approach: try Tier 1 first if we have minimum tokens
-        if current_tokens >= self._min_tokens and await self._try_segment_at_tier(
-            TIER1_SEPARATORS
-        ):
-            return
+    async def _check_and_segment(self) -> None:
+        """Segment the buffer using the tiered separator approach.
+
+        Loops until no further segment is ready, so one large chunk can
+        produce any number of segments.
+        """
+        while not self._token.cancelled():
+            # Get current token count; below both limits the buffer isn't read
+            current_tokens = self._token_count
+            if current_tokens < self._min_tokens and current_tokens < self._max_tokens:
+                return
 
-        # If approaching max tokens but Tier 1 failed, try Tier 2
-        if current_tokens >= self._max_tokens * 0.8 and await self._try_segment_at_tier(
-            TIER2_SEPARATORS
-        ):
-            return
+            if not self._has_content():
+                return
 
-    async def _try_segment_at_tier(self, pattern: re.Pattern) -> bool:
-        """Try to segment using the given separator pattern. Returns True if segmented."""
-        break_point = self._find_break_point_with_pattern(pattern)
+            position = (self._buf_start, self._buf_len)
 
-        if break_point > 0:
-            # Found a good break point - emit up to here
-            segment_text = self._buf[:break_point]
-            remaining = self._buf[break_point:]
+            if current_tokens >= self._max_tokens:
+                # Over max tokens: break at a separator within the limit if
+                # there is one, otherwise force segmentation
+                limit = self._char_offset(self._max_tokens)
+                if not await self._try_segment(allow_tier2=True, limit=limit):
+                    await self._emit_with_token_boundary()
+            elif not await self._try_segment(
+                allow_tier2=current_tokens >= self._max_tokens * 0.8
+            ):
+                # Tiered approach: Tier 1 if we have minimum tokens, Tier 2
+                # only when approaching max tokens
+                return
 
-            self._buf = segment_text
-            await self._emit()
+            if (self._buf_start, self._buf_len) == position:
+                return  # Nothing was consumed; wait for more text
 
-            # Keep remaining text in buffer
-            self._buf = remaining
+    async def _try_segment(
+        self, *, allow_tier2: bool, limit: int | None = None
+    ) -> bool:
+        """Try to segment at a separator. Returns True if segmented."""
+        break_point = self._find_break_point(allow_tier2=allow_tier2, limit=limit)
 
-            # Only recurse if remaining text has substantial content
-            if (
-                remaining.strip()
-                and len(self._encoder.encode(remaining)) >= self._min_tokens
-            ):
-                await self._check_and_segment()  # Use main logic for recursion
+        if break_point > 0:
+            # Found a good break point - emit up to here and keep the rest
+            segment_text = self._buf[self._buf_start : break_point]
+            self._consume(break_point)
+            await self._send_segment(segment_text)
             return True
 
         return False  # No suitable break point found
 
-    def _find_break_point_with_pattern(self, pattern: re.Pattern) -> int:
-        """Find the first valid break point with sufficient tokens using given pattern."""
-        for match in pattern.finditer(self._buf):
-            end_pos = match.end()
-            segment_text = self._buf[:end_pos]
-            token_count = len(self._encoder.encode(segment_text))
+    def _find_break_point(self, *, allow_tier2: bool, limit: int | None = None) -> int:
+        """Find the first valid break point with sufficient tokens.
+
+        Tier 1 matches win; the first valid Tier 2 match is the fallback.
+        """
+        if self._token_count < self._min_tokens:
+            return 0
 
-            if token_count >= self._min_tokens:
-                return end_pos
+        # A prefix holds min_tokens once it reaches past the start of the
+        # min_tokens-th token, so no prefix needs to be re-encoded
+        threshold = self._char_offset(self._min_tokens - 1)
 
-        return 0  # No suitable break point found
+        return _scan_for_break(
+            self._buf, self._scan_start, threshold, allow_tier2, limit
+        )
 
     async def _emit_with_token_boundary(self) -> None:
         """Emit segment respecting token boundaries when hitting max tokens."""
-        if not self._buf.strip():
+        if not self._has_content():
             return
 
-        tokens = self._encoder.encode(self._buf)
-
         # If we're not over limit, just emit normally
-        if len(tokens) <= self._max_tokens:
+        token_count = self._token_count
+        if token_count <= self._max_tokens:
             await self._emit()
             return
 
-        # Find the best break point within token limit
-        best_break = self._find_token_break_point(tokens)
-
-        # Split at the break point
-        text_to_emit = self._encoder.decode(tokens[:best_break])
-        remaining_tokens = tokens[best_break:]
-
-        if text_to_emit.strip():
-            self._buf = text_to_emit
-            await self._emit(token_boundary=True)
+        # Find the best break point within token limit and split there
+        split = self._char_offset(self._find_token_break_point(token_count))
+        text_to_emit = self._buf[self._buf_start : split]
 
         # Keep remaining text in buffer
-        self._buf = self._encoder.decode(remaining_tokens)
+        self._consume(split)
 
-    def _find_token_break_point(self, tokens: list) -> int:
-        """Find optimal token break point within limits."""
-        max_search = min(len(tokens), self._max_tokens)
+        await self._send_segment(text_to_emit)
 
-        # Look backwards from max_tokens to find any separator (tier 1 or 2)
-        for i in range(max_search, self._min_tokens, -1):
-            partial_text = self._encoder.decode(tokens[:i])
-            if TIER1_SEPARATORS.search(partial_text) or TIER2_SEPARATORS.search(
-                partial_text
-            ):
-                return i
+    def _find_token_break_point(self, token_count: int) -> int:
+        """Find optimal token break point within limits."""
+        max_search = min(token_count, self._max_tokens)
+        buf, start = self._buf, self._buf_start
+
+        # Look backwards from max_tokens to find any separator (tier 1 or 2);
+        # endpos makes the scan behave as if the text ended there. One scan
+        # covers every window: a match that doesn't rely on the text ending
+        # is also in the largest window, and the rest are stops at the end.
+        end = self._char_offset(max_search)
+        if max_search > self._min_tokens and SEPARATOR_CHAR.search(buf, start, end):
+            if SEPARATORS.search(buf, start, end):
+                return max_search
+            for i in range(max_search - 1, self._min_tokens, -1):
+                text = buf[start : self._char_offset(i)].rstrip()
+                if text and text[-1] in SENTENCE_STOPS:
+                    return i
 
         # If no sentence break found, look for word boundaries
         for i in range(self._max_tokens, self._min_tokens, -1):
-            if i >= len(tokens):
+            if i >= token_count:
                 continue
-            partial_text = self._encoder.decode(tokens[:i])
-            if partial_text.endswith((" ", "\n", "\t")):
+            end = self._char_offset(i)
+            if end > start and buf[end - 1] in WORD_BREAK_CHARS:
                 return i
 
-        return min(self._max_tokens, len(tokens))
+        return min(self._max_tokens, token_count)
 
     async def _emit(
         self, *, smart_break: bool = False, token_boundary: bool = False
     ) -> None:
         """Unified emit method with optional smart breaking and token boundary handling."""
-        if not self._buf:
+        if self._buf_len <= self._buf_start:
             return
 
-        text = self._buf
-        if not text.strip():  # Only skip if the text is purely whitespace
-            self._buf = ""
-            return
+        text = self._buf[self._buf_start :]
 
         # Handle smart breaking if requested
-        if smart_break and not token_boundary:
-            break_point = self._find_smart_break_point()
-            if break_point < len(text):
-                text = text[:break_point]
-                self._buf = self._buf[break_point:]  # Keep remaining
-            else:
-                self._buf = ""  # Using full buffer
+        if smart_break and not token_boundary and text.strip():
+            break_point = self._find_smart_break_point(text)
+            self._consume(self._buf_start + break_point)  # Keep remaining
+            text = text[:break_point]
         else:
-            self._buf = ""  # Clear buffer for normal emit
+            self._clear_buffer()  # Clear buffer for normal emit
+
+        await self._send_segment(text)
+
+    async def _send_segment(self, text: str) -> None:
+        """Clean, hook and send one segment of text."""
+        # Cancellation is checked once per segment rather than per chunk
+        if self._token.cancelled():
+            return
+
+        if not text.strip():  # Only skip if the text is purely whitespace
+            return
 
         # Apply markdown cleaning to complete segment text
-        if text.strip():  # Only clean non-whitespace text
-            text = clean_markdown(text)
+        text = clean_markdown(text)
 
         if self._pre_hook:
             text = await self._pre_hook(text)
 
-        if text:  # Only emit if there's content after processing
-            segment = Segment(self._segment_id, text)
+        # Only emit if there's content after processing (and the hook didn't
+        # see the stream cancelled)
+        if text and not self._token.cancelled():
+            segment = Segment(self._segment_id, text, anyio.current_time())
             self._segment_id += 1
-            await self._send_stream.send(segment)
+            await self._send(segment)
+
+    async def _send(self, segment: Segment) -> None:
+        """Send a segment, skipping the scheduler round trip when there's room.
+
+        A burst of segments from one chunk goes out back to back; only a full
+        stream makes the segmenter wait (and yield).
+        """
+        if self._send_nowait is not None:
+            try:
+                self._send_nowait(segment)
+                return
+            except anyio.WouldBlock:
+                pass
+        await self._send_stream.send(segment)
 
-    def _find_smart_break_point(self) -> int:
+    def _find_smart_break_point(self, text: str) -> int:
         """Find optimal word boundary break point within last 20 characters."""
-        if len(self._buf) <= 20:
-            return len(self._buf)
+        if len(text) <= 20:
+            return len(text)
 
-        search_start = max(0, len(self._buf) - 20)
+        search_start = max(0, len(text) - 20)
 
-        # Look backwards for good break points
-        for i in range(len(self._buf) - 1, search_start - 1, -1):
-            char = self._buf[i]
-            if char in " ,;:" or char in "-—–":
-                return i + 1
+        # Last good break character in the window; rfind scans in C
+        last = max(text.rfind(char, search_start) for char in SMART_BREAK_CHARS)
+        if last >= 0:
+            return last + 1
 
-        return len(self._buf)  # No good break found
+        return len(text)  # No good break found
 
     async def flush(self) -> None:
         await self._emit()
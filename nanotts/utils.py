@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+from functools import lru_cache
 import re
 import unicodedata
 
@@ -17,26 +18,54 @@ MARKDOWN_PATTERNS = [
     (re.compile(r"^\s*\d+\.\s+", re.MULTILINE), ""),  # 1. list → text
 ]
 
+# Literal text each pattern above needs in order to match; a pass is skipped
+# when none of its markers occur, which is cheaper than a regex scan
+MARKDOWN_MARKERS = [
+    ("**",),
+    ("*",),
+    ("`",),
+    ("#",),
+    ("](",),
+    (">",),
+    ("-", "*", "+"),
+    (".",),
+]
+
+# Any text a markdown pattern could match contains one of these
+MARKDOWN_HINT = re.compile(r"[*`#>+-]|\]\(|\d\.\s")
+
+# Text without these is already NFC (pure ASCII) and has nothing to fold or
+# collapse
+NEEDS_NORMALIZE = re.compile(r"[^\x00-\x7f]|[\t\r]|  |\n\s*\n\s*\n")
+
+# Tabs read as spaces; carriage returns carry nothing for speech
+WHITESPACE_FOLD = {ord("\t"): " ", ord("\r"): None}
+
+SPACE_RUNS = re.compile(r"  +")
+BLANK_LINE_RUNS = re.compile(r"\n\s*\n\s*\n+")
+
 
 def normalize_text(text: str) -> str:
     """Normalize unicode text for consistent processing."""
-    if not text:
+    if not text or NEEDS_NORMALIZE.search(text) is None:
         return text
 
     # Unicode normalization (NFC form) - preserve all whitespace
     normalized = unicodedata.normalize("NFC", text)
 
-    # Only normalize excessive whitespace, but preserve single spaces and structure
-    normalized = re.sub(
-        r"  +", " ", normalized
-    )  # Multiple spaces → single space (but keep single spaces)
-    normalized = re.sub(
-        r"\n\s*\n\s*\n+", "\n\n", normalized
-    )  # Multiple newlines → double newline max
+    # Only normalize excessive whitespace, but preserve single spaces and
+    # structure. Each pass runs only when a substring test shows it can match.
+    if "\t" in normalized or "\r" in normalized:
+        normalized = normalized.translate(WHITESPACE_FOLD)
+    if "  " in normalized:
+        normalized = SPACE_RUNS.sub(" ", normalized)  # Multiple spaces → one
+    if normalized.count("\n") >= 3:
+        normalized = BLANK_LINE_RUNS.sub("\n\n", normalized)  # Max double newline
 
     return normalized  # Don't strip - preserve leading/trailing spaces!
 
 
+@lru_cache(maxsize=256)
 def clean_markdown(text: str) -> str:
     """Remove markdown formatting while preserving text content."""
     if not text:
@@ -44,12 +73,19 @@ def clean_markdown(text: str) -> str:
 
     cleaned = text
 
-    # Apply all markdown cleaning patterns
-    for pattern, replacement in MARKDOWN_PATTERNS:
-        cleaned = pattern.sub(replacement, cleaned)
+    # Apply all markdown cleaning patterns, in order: later patterns see the
+    # output of earlier ones (e.g. "> **bold**"). A plain loop over the
+    # markers, as any() over a generator costs more than the substring tests.
+    if MARKDOWN_HINT.search(cleaned):
+        for (pattern, replacement), markers in zip(MARKDOWN_PATTERNS, MARKDOWN_MARKERS):
+            for marker in markers:
+                if marker in cleaned:
+                    cleaned = pattern.sub(replacement, cleaned)
+                    break
 
     # Only normalize excessive whitespace, preserve structure
-    cleaned = re.sub(r"  +", " ", cleaned)  # Multiple spaces → single space
+    if "  " in cleaned:
+        cleaned = SPACE_RUNS.sub(" ", cleaned)  # Multiple spaces → single space
 
     return cleaned  # Don't strip - preserve leading/trailing spaces
 
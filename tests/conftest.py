@@ -0,0 +1,118 @@
+import asyncio
+import sys
+
+import anyio
+import pytest
+import pytest_asyncio.plugin
+
+from nanotts import AudioSpec, NanoTTS
+from nanotts.segmenter import _get_encoder
+
+try:
+    if sys.platform == "win32":
+        import winloop as loop_module  # uvloop's API, built for Windows
+    else:
+        import uvloop as loop_module
+except ImportError:
+    loop_module = None
+
+# The loop factory hook only exists from pytest-asyncio 1.4; defining it on
+# older versions is a plugin validation error
+_HAS_LOOP_FACTORY_HOOK = hasattr(
+    getattr(pytest_asyncio.plugin, "PytestAsyncioSpecs", None),
+    "pytest_asyncio_loop_factories",
+)
+
+if loop_module is not None and _HAS_LOOP_FACTORY_HOOK:
+
+    def pytest_asyncio_loop_factories(config, item):
+        """Run the asyncio tests on uvloop (winloop on Windows) when installed."""
+        return {loop_module.__name__: loop_module.new_event_loop}
+
+
+class _VirtualTimeLoop(asyncio.SelectorEventLoop):
+    """Event loop whose clock jumps ahead instead of waiting for a timer.
+
+    Only for code that never waits on threads or real I/O: those would see
+    their timeouts expire instantly.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._now = 0.0
+        select = self._selector.select
+
+        def jump(timeout=None):
+            if timeout:
+                self._now += timeout
+                timeout = 0
+            return select(timeout)
+
+        self._selector.select = jump
+
+    def time(self) -> float:
+        return self._now
+
+
+@pytest.fixture(scope="session")
+def encoder():
+    """The segmenter's own cached encoder, so counts match what it measured."""
+    return _get_encoder("cl100k_base")
+
+
+@pytest.fixture(scope="session")
+def spec_pcm_16k():
+    """16 kHz mono 16-bit PCM; AudioSpec is frozen, so sharing it is safe."""
+    return AudioSpec("pcm", 16000, 1, 16)
+
+
+@pytest.fixture(scope="session")
+def spec_mp3_24k():
+    """24 kHz mono MP3, the format Edge-TTS produces."""
+    return AudioSpec("mp3", 24000, 1, None)
+
+
+@pytest.fixture
+def run_virtual_time():
+    """Run an async function to completion with sleeps taking no real time."""
+
+    def run(func, *args):
+        return anyio.run(
+            func, *args, backend_options={"loop_factory": _VirtualTimeLoop}
+        )
+
+    return run
+
+
+async def _collect(tts, source):
+    """Stream source through tts and return the segment texts in order."""
+    return [text async for _, text in tts.stream(source)]
+
+
+@pytest.fixture
+def collect():
+    """The `_collect` helper, as a fixture so test modules need no import."""
+    return _collect
+
+
+# Each stream() call starts from a fresh cancellation token, so a cancel() in
+# one test doesn't reach the next: instances can be shared by any test that
+# doesn't change their settings
+
+
+@pytest.fixture(scope="module")
+def tts_default():
+    """Dummy-engine NanoTTS with default settings."""
+    return NanoTTS(model="dummy")
+
+
+@pytest.fixture(scope="module")
+def tts_tokens_1_10():
+    """Dummy-engine NanoTTS segmenting between 1 and 10 tokens."""
+    return NanoTTS(model="dummy", min_tokens=1, max_tokens=10)
+
+
+@pytest.fixture(scope="module")
+def tts_tokens_3_20():
+    """Dummy-engine NanoTTS segmenting between 3 and 20 tokens."""
+    return NanoTTS(model="dummy", min_tokens=3, max_tokens=20)
@@ -2,6 +2,7 @@
 Tests for audio_data module - AudioSpec, AudioChunk, and AudioTranscoder.
 """
 
+import struct
 from unittest.mock import patch
 
 import pytest
@@ -41,20 +42,18 @@ class TestAudioSpec:
 class TestAudioChunk:
     """Test AudioChunk data structure."""
 
-    def test_creation(self):
+    def test_creation(self, spec_pcm_16k):
         """Test AudioChunk creation."""
-        spec = AudioSpec("pcm", 16000, 1, 16)
-        chunk = AudioChunk(b"test_data", spec)
+        chunk = AudioChunk(b"test_data", spec_pcm_16k)
 
         assert chunk.data == b"test_data"
-        assert chunk.spec == spec
+        assert chunk.spec == spec_pcm_16k
 
-    def test_with_different_specs(self):
+    def test_with_different_specs(self, spec_pcm_16k):
         """Test AudioChunk with different specs."""
-        pcm_spec = AudioSpec("pcm", 16000, 1, 16)
         mp3_spec = AudioSpec("mp3", 24000, 2, None)
 
-        pcm_chunk = AudioChunk(b"pcm_data", pcm_spec)
+        pcm_chunk = AudioChunk(b"pcm_data", spec_pcm_16k)
         mp3_chunk = AudioChunk(b"mp3_data", mp3_spec)
 
         assert pcm_chunk.spec.codec == "pcm"
@@ -65,15 +64,12 @@ class TestAudioChunk:
 class TestUnsupportedFormat:
     """Test UnsupportedFormat exception."""
 
-    def test_exception_creation(self):
+    def test_exception_creation(self, spec_pcm_16k, spec_mp3_24k):
         """Test UnsupportedFormat exception."""
-        source = AudioSpec("mp3", 24000, 1, None)
-        target = AudioSpec("pcm", 16000, 1, 16)
-
-        exc = UnsupportedFormat(source, target)
+        exc = UnsupportedFormat(spec_mp3_24k, spec_pcm_16k)
 
-        assert exc.source == source
-        assert exc.target == target
+        assert exc.source == spec_mp3_24k
+        assert exc.target == spec_pcm_16k
         assert "mp3" in str(exc)
         assert "pcm" in str(exc)
 
@@ -81,18 +77,54 @@ class TestUnsupportedFormat:
 class TestAudioTranscoder:
     """Test AudioTranscoder functionality."""
 
-    def test_no_conversion_needed(self):
+    def test_no_conversion_needed(self, spec_pcm_16k):
         """Test when no conversion is needed."""
-        spec = AudioSpec("pcm", 16000, 1, 16)
-        chunk = AudioChunk(b"test_data", spec)
+        chunk = AudioChunk(b"test_data", spec_pcm_16k)
 
         # Should return same chunk when specs match
         result = pytest.importorskip("asyncio").run(
-            AudioTranscoder.convert(chunk, spec)
+            AudioTranscoder.convert(chunk, spec_pcm_16k)
         )
 
         assert result is chunk
 
+    @pytest.mark.asyncio
+    async def test_pcm_width_conversion_without_ffmpeg(self, spec_pcm_16k):
+        """Test sample width changes are handled in-process."""
+        target_spec = AudioSpec("pcm", 16000, 1, 32)
+        samples = [1, -2, 32767, -32768]
+        chunk = AudioChunk(struct.pack("<4h", *samples), spec_pcm_16k)
+
+        with patch(
+            "nanotts.audio_data.AudioTranscoder.is_ffmpeg_available",
+            return_value=False,
+        ):
+            widened = await AudioTranscoder.convert(chunk, target_spec)
+            narrowed = await AudioTranscoder.convert(widened, spec_pcm_16k)
+
+        assert widened.spec == target_spec
+        assert struct.unpack("<4i", widened.data) == tuple(s << 16 for s in samples)
+        assert narrowed.data == chunk.data
+
+    def test_pcm_mono_to_stereo_conversion(self, spec_pcm_16k):
+        """Test mono PCM is duplicated across channels."""
+        target_spec = AudioSpec("pcm", 16000, 2, 24)
+        chunk = AudioChunk(struct.pack("<2h", 1, -1), spec_pcm_16k)
+
+        result = AudioTranscoder.convert_pcm(chunk, target_spec)
+
+        assert result is not None
+        assert result.data == b"\x00\x01\x00" * 2 + b"\x00\xff\xff" * 2
+
+    def test_pcm_fast_path_declines_resampling(self, spec_pcm_16k):
+        """Test conversions needing ffmpeg are not attempted in-process."""
+        chunk = AudioChunk(b"\x00\x00" * 4, spec_pcm_16k)
+
+        assert (
+            AudioTranscoder.convert_pcm(chunk, AudioSpec("pcm", 22050, 1, 16)) is None
+        )
+        assert AudioTranscoder.convert_pcm(chunk, AudioSpec("mp3", 16000, 1)) is None
+
     def test_is_ffmpeg_available(self):
         """Test ffmpeg availability detection."""
         # Test when ffmpeg is available
@@ -103,22 +135,20 @@ class TestAudioTranscoder:
         with patch("shutil.which", return_value=None):
             assert AudioTranscoder.is_ffmpeg_available() is False
 
-    def test_get_ffmpeg_format_pcm(self):
+    def test_get_ffmpeg_format_pcm(self, spec_pcm_16k):
         """Test ffmpeg format detection for PCM."""
-        spec16 = AudioSpec("pcm", 16000, 1, 16)
         spec24 = AudioSpec("pcm", 16000, 1, 24)
         spec32 = AudioSpec("pcm", 16000, 1, 32)
 
-        assert AudioTranscoder.get_ffmpeg_format(spec16) == "s16le"
+        assert AudioTranscoder.get_ffmpeg_format(spec_pcm_16k) == "s16le"
         assert AudioTranscoder.get_ffmpeg_format(spec24) == "s24le"
         assert AudioTranscoder.get_ffmpeg_format(spec32) == "s32le"
 
-    def test_get_ffmpeg_format_compressed(self):
+    def test_get_ffmpeg_format_compressed(self, spec_mp3_24k):
         """Test ffmpeg format detection for compressed formats."""
-        mp3_spec = AudioSpec("mp3", 24000, 1, None)
         opus_spec = AudioSpec("opus", 48000, 1, None)
 
-        assert AudioTranscoder.get_ffmpeg_format(mp3_spec) == "mp3"
+        assert AudioTranscoder.get_ffmpeg_format(spec_mp3_24k) == "mp3"
         assert AudioTranscoder.get_ffmpeg_format(opus_spec) == "opus"
 
     def test_get_ffmpeg_format_unsupported(self):
@@ -126,12 +156,34 @@ class TestAudioTranscoder:
         unknown_spec = AudioSpec("unknown", 16000, 1, 16)
         assert AudioTranscoder.get_ffmpeg_format(unknown_spec) is None
 
+    def test_get_ffmpeg_command(self, spec_pcm_16k, spec_mp3_24k):
+        """Test ffmpeg command construction is cached per spec pair."""
+        command = AudioTranscoder.get_ffmpeg_command(spec_pcm_16k, spec_mp3_24k)
+
+        assert command[0] == "ffmpeg"
+        assert command[command.index("-f") + 1] == "s16le"
+        assert command[command.index("-ar") + 1] == "16000"
+        assert command[-1] == "pipe:1"
+        assert AudioTranscoder.get_ffmpeg_command(spec_pcm_16k, spec_mp3_24k) is command
+
+        unknown_spec = AudioSpec("unknown", 16000, 1, 16)
+        assert AudioTranscoder.get_ffmpeg_command(unknown_spec, spec_mp3_24k) == ()
+
+    def test_estimate_output_size(self, spec_pcm_16k, spec_mp3_24k):
+        """Test output buffer size estimation from input duration."""
+        chunk = AudioChunk(b"\x00\x00" * 16000, spec_pcm_16k)  # One second
+
+        pcm_target = AudioSpec("pcm", 8000, 2, 16)
+        assert AudioTranscoder.estimate_output_size(chunk, pcm_target) == 32000
+        assert AudioTranscoder.estimate_output_size(chunk, spec_mp3_24k) == 40000
+
+        mp3_chunk = AudioChunk(b"fake_mp3_data", spec_mp3_24k)
+        assert AudioTranscoder.estimate_output_size(mp3_chunk, spec_pcm_16k) == 0
+
     @pytest.mark.asyncio
-    async def test_conversion_no_ffmpeg_raises_error(self):
+    async def test_conversion_no_ffmpeg_raises_error(self, spec_pcm_16k, spec_mp3_24k):
         """Test conversion fails when ffmpeg not available."""
-        source_spec = AudioSpec("mp3", 24000, 1, None)
-        target_spec = AudioSpec("pcm", 16000, 1, 16)
-        chunk = AudioChunk(b"fake_mp3_data", source_spec)
+        chunk = AudioChunk(b"fake_mp3_data", spec_mp3_24k)
 
         # Mock no ffmpeg available and no ffmpeg-python
         with (
@@ -142,17 +194,16 @@ class TestAudioTranscoder:
             ),
         ):
             with pytest.raises(UnsupportedFormat) as exc_info:
-                await AudioTranscoder.convert(chunk, target_spec)
+                await AudioTranscoder.convert(chunk, spec_pcm_16k)
 
-            assert exc_info.value.source == source_spec
-            assert exc_info.value.target == target_spec
+            assert exc_info.value.source == spec_mp3_24k
+            assert exc_info.value.target == spec_pcm_16k
 
     @pytest.mark.asyncio
-    async def test_ffmpeg_python_import_error_fallback(self):
+    async def test_ffmpeg_python_import_error_fallback(self, spec_pcm_16k):
         """Test fallback to manual ffmpeg when ffmpeg-python not available."""
-        source_spec = AudioSpec("pcm", 16000, 1, 16)
         target_spec = AudioSpec("pcm", 22050, 1, 16)
-        chunk = AudioChunk(b"test_pcm_data", source_spec)
+        chunk = AudioChunk(b"test_pcm_data", spec_pcm_16k)
 
         # Mock ffmpeg-python import error but manual ffmpeg fails too
         with (
@@ -170,13 +221,12 @@ class TestAudioTranscoder:
         not AudioTranscoder.is_ffmpeg_available(), reason="ffmpeg not available"
     )
     @pytest.mark.asyncio
-    async def test_manual_ffmpeg_conversion(self):
+    async def test_manual_ffmpeg_conversion(self, spec_pcm_16k):
         """Test manual ffmpeg conversion (requires actual ffmpeg)."""
         # Create test PCM data (silence)
         pcm_data = b"\x00\x00" * 1600  # 100ms of 16-bit PCM at 16kHz
-        source_spec = AudioSpec("pcm", 16000, 1, 16)
         target_spec = AudioSpec("pcm", 8000, 1, 16)  # Downsample
-        chunk = AudioChunk(pcm_data, source_spec)
+        chunk = AudioChunk(pcm_data, spec_pcm_16k)
 
         # Force use of manual ffmpeg by mocking ffmpeg-python import failure
         with patch.dict("sys.modules", {"ffmpeg": None}):
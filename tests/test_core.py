@@ -3,20 +3,29 @@ Core integration tests for nanoTTS.
 Tests the essential functionality described in the dev docs.
 """
 
+import re
+
 import anyio
 import pytest
 
-from nanotts import AudioChunk, AudioSpec, NanoTTS
-from nanotts.audio_data import UnsupportedFormat
-from nanotts.engine import CallableEngine
+from nanotts import AudioChunk, NanoTTS
 from nanotts.model import manager
 
+# Decimal numbers and prices that segmentation must keep whole
+_NUM_RE = re.compile(r"\$?\d+\.\d+")
+
+# Dotted abbreviations and numbers that must not be split; one alternation
+# finds them all in a single scan
+_ABBREVIATION_RE = re.compile(
+    "|".join(map(re.escape, ("Ph.D.", "U.S.A.", "3.5", "$45.99")))
+)
+
 
 class TestCoreIntegration:
     """Essential integration tests from dev docs requirements."""
 
     @pytest.mark.asyncio
-    async def test_tiktoken_segmentation_core_logic(self):
+    async def test_tiktoken_segmentation_core_logic(self, collect, encoder):
         """Test core token-based segmentation logic."""
         tts = NanoTTS(model="dummy", min_tokens=3, max_tokens=15)
 
@@ -25,113 +34,93 @@ class TestCoreIntegration:
             parts = ["Hello world. ", "How are you? ", "Fine thanks."]
             for part in parts:
                 yield part
-                await anyio.sleep(0.01)
+                await anyio.sleep(0)
 
-        results = []
-        async for chunk, text in tts.stream(incremental_sentences()):
-            results.append(text)
+        results = await collect(tts, incremental_sentences())
 
         # Should break at sentence boundaries when streaming incrementally
         assert len(results) >= 2
         # Each segment should contain complete sentences
-        for result in results:
-            assert result.strip()  # No empty segments
+        assert all(result.strip() for result in results), results  # No empty segments
 
         # Test 2: Token limit enforcement
         long_text = "This is a very long sentence that definitely exceeds our token limits and should be broken appropriately at word boundaries while respecting token counts."
 
-        results2 = []
-        async for chunk, text in tts.stream(long_text):
-            results2.append(text)
+        results2 = await collect(tts, long_text)
 
         # Should break when exceeding max_tokens
         if len(results2) > 1:
-            import tiktoken
-
-            enc = tiktoken.get_encoding("cl100k_base")
-            for segment in results2[:-1]:  # All but last
-                tokens = len(enc.encode(segment))
-                assert tokens <= 15  # Should respect max_tokens
-
-    @pytest.mark.asyncio
-    async def test_abbreviation_preservation(self):
-        """Test that abbreviations like Ph.D don't get broken incorrectly."""
-        tts = NanoTTS(model="dummy", min_tokens=3, max_tokens=20)
-
-        # Test the original problem case
-        test_cases = [
+            # All but last should respect max_tokens
+            token_counts = [len(encoder.encode(segment)) for segment in results2[:-1]]
+            assert all(count <= 15 for count in token_counts), token_counts
+
+    # Test the original problem case
+    @pytest.mark.parametrize(
+        "text",
+        [
             "Dr. Smith has a Ph.D. in Computer Science.",
             "The U.S.A. is a large country with many Ph.D. programs.",
             "Students study for 3.5 years on average, earning $45.99 per hour.",
             "Version 2.1 includes updates to section 1.5 and appendix A.3.",
-        ]
-
-        for text in test_cases:
-            results = []
-            async for chunk, segment in tts.stream(text):
-                results.append(segment)
+        ],
+    )
+    @pytest.mark.asyncio
+    async def test_abbreviation_preservation(self, collect, text, tts_tokens_3_20):
+        """Test that abbreviations like Ph.D don't get broken incorrectly."""
+        results = await collect(tts_tokens_3_20, text)
 
-            full_text = " ".join(results)
+        full_text = " ".join(results)
 
-            # Key test: abbreviations should stay together
-            if "Ph.D." in text:
-                assert "Ph.D." in full_text, f"Ph.D. was broken in: {full_text}"
-            if "U.S.A." in text:
-                assert "U.S.A." in full_text, f"U.S.A. was broken in: {full_text}"
-            if "3.5" in text:
-                assert "3.5" in full_text, f"3.5 was broken in: {full_text}"
-            if "$45.99" in text:
-                assert "$45.99" in full_text, f"$45.99 was broken in: {full_text}"
+        # Key test: abbreviations should stay together
+        expected = set(_ABBREVIATION_RE.findall(text))
+        broken = expected - set(_ABBREVIATION_RE.findall(full_text))
+        assert not broken, f"{sorted(broken)} broken in: {full_text}"
 
-    @pytest.mark.asyncio
-    async def test_markdown_preprocessing(self):
-        """Test that markdown is properly cleaned before segmentation."""
-        tts = NanoTTS(model="dummy", min_tokens=3, max_tokens=20)
-
-        markdown_cases = [
+    @pytest.mark.parametrize(
+        "markdown_input, expected_clean",
+        [
             ("### What is a **Ph.D**?", "What is a Ph.D?"),
             ("The `code` and *italic* text.", "The code and italic text."),
             ("[Click here](http://example.com) for more.", "Click here for more."),
             ("> This is a quote with **bold**.", "This is a quote with bold."),
             ("- Item 1\n- Item 2\n- Item 3", "Item 1 Item 2 Item 3"),
-        ]
-
-        for markdown_input, expected_clean in markdown_cases:
-            results = []
-            async for chunk, segment in tts.stream(markdown_input):
-                results.append(segment)
+        ],
+    )
+    @pytest.mark.asyncio
+    async def test_markdown_preprocessing(
+        self, collect, markdown_input, expected_clean, tts_tokens_3_20
+    ):
+        """Test that markdown is properly cleaned before segmentation."""
+        results = await collect(tts_tokens_3_20, markdown_input)
 
-            full_text = " ".join(results)
+        full_text = " ".join(results)
 
-            # Check markdown was cleaned
-            assert "**" not in full_text, f"Bold markdown not cleaned: {full_text}"
-            assert "###" not in full_text, f"Header markdown not cleaned: {full_text}"
-            assert "`" not in full_text, f"Code markdown not cleaned: {full_text}"
-            assert "[" not in full_text or "]" not in full_text, (
-                f"Link markdown not cleaned: {full_text}"
-            )
+        # Check markdown was cleaned
+        assert "**" not in full_text, f"Bold markdown not cleaned: {full_text}"
+        assert "###" not in full_text, f"Header markdown not cleaned: {full_text}"
+        assert "`" not in full_text, f"Code markdown not cleaned: {full_text}"
+        assert "[" not in full_text or "]" not in full_text, (
+            f"Link markdown not cleaned: {full_text}"
+        )
 
-            # Check key content preserved
-            if "Ph.D" in expected_clean:
-                assert "Ph.D" in full_text, f"Ph.D not preserved: {full_text}"
+        # Check key content preserved
+        if "Ph.D" in expected_clean:
+            assert "Ph.D" in full_text, f"Ph.D not preserved: {full_text}"
 
     @pytest.mark.asyncio
-    async def test_cancellation_stops_processing(self):
+    async def test_cancellation_stops_processing(self, collect, tts_tokens_1_10):
         """Test cancellation stops further processing."""
-        tts = NanoTTS(model="dummy", min_tokens=1, max_tokens=10)
 
         # Test cancellation after getting some output
         async def slow_text():
             parts = ["Hello world. ", "This should be cancelled."]
             for i, part in enumerate(parts):
                 yield part
-                await anyio.sleep(0.01)
+                await anyio.sleep(0.01)  # Let the first segment reach the caller
                 if i == 0:  # Cancel after first part is yielded
-                    tts.cancel()
+                    tts_tokens_1_10.cancel()
 
-        results = []
-        async for chunk, text in tts.stream(slow_text()):
-            results.append(text)
+        results = await collect(tts_tokens_1_10, slow_text())
 
         # Should have at least some output before cancellation
         assert len(results) >= 1
@@ -156,73 +145,22 @@ class TestCoreIntegration:
 
         assert tts._engine is not None
 
-    def test_audio_spec_dataclass(self):
-        """Test AudioSpec/AudioChunk data structures from dev docs."""
-        # Test AudioSpec
-        spec = AudioSpec("pcm", 16000, 1, 16)
-        assert spec.codec == "pcm"
-        assert spec.sample_rate == 16000
-        assert spec.channels == 1
-        assert spec.sample_width == 16
-
-        # Test equality
-        spec2 = AudioSpec("pcm", 16000, 1, 16)
-        spec3 = AudioSpec("mp3", 16000, 1, None)
-        assert spec == spec2
-        assert spec != spec3
-
-        # Test AudioChunk
-        chunk = AudioChunk(b"test_data", spec)
-        assert chunk.data == b"test_data"
-        assert chunk.spec == spec
-
-    @pytest.mark.asyncio
-    async def test_callable_engine_wrapper(self):
-        """Test CallableEngine wrapper from dev docs."""
-
-        def dummy_synth(text: str) -> bytes:
-            return f"audio_for_{text}".encode()
-
-        spec = AudioSpec("pcm", 16000, 1, 16)
-        engine = CallableEngine(dummy_synth, output_spec=spec)
-
-        chunk = await engine.synth("hello")
-
-        assert chunk.data == b"audio_for_hello"
-        assert chunk.spec == spec
-
-    @pytest.mark.asyncio
-    async def test_minimal_transcoder_concept(self):
-        """Test transcoding concept (UnsupportedFormat for missing ffmpeg)."""
-        source_spec = AudioSpec("mp3", 24000, 1, None)
-        target_spec = AudioSpec("pcm", 16000, 1, 16)
-
-        # Test exception
-        exc = UnsupportedFormat(source_spec, target_spec)
-        assert exc.source == source_spec
-        assert exc.target == target_spec
-        assert "mp3" in str(exc) and "pcm" in str(exc)
-
     @pytest.mark.asyncio
     async def test_streaming_api_requirements(self):
         """Test streaming API handles different input types."""
         tts = NanoTTS(model="dummy", min_tokens=2, max_tokens=15, timeout_ms=800)
 
         # Test 1: String input
-        chunks = []
-        async for chunk, text in tts.stream("Hello world"):
-            chunks.append((chunk, text))
+        chunks = [item async for item in tts.stream("Hello world")]
         assert len(chunks) >= 1
 
         # Test 2: Async iterable input (preserves spaces properly)
         async def text_tokens():
-            for token in ["Hello", " ", "world"]:
-                yield token
-                await anyio.sleep(0.01)
+            yield "Hello"
+            yield " "
+            yield "world"
 
-        chunks = []
-        async for chunk, text in tts.stream(text_tokens()):
-            chunks.append((chunk, text))
+        chunks = [item async for item in tts.stream(text_tokens())]
 
         # Should handle streaming input and preserve spaces
         assert len(chunks) >= 1
@@ -246,16 +184,12 @@ class TestTiktokenRegressionPrevention:
     """Prevent regressions - focus on the original problems we solved."""
 
     @pytest.mark.asyncio
-    async def test_phd_abbreviation_not_broken(self):
+    async def test_phd_abbreviation_not_broken(self, collect, tts_tokens_3_20):
         """Prevent regression: Ph.D should never be broken into Ph. + D."""
-        tts = NanoTTS(model="dummy", min_tokens=3, max_tokens=20)
-
         # The original failing case from the user's example
         problematic_text = "what is a Ph.D? A Ph.D. (Doctor of Philosophy) is the highest academic degree"
 
-        results = []
-        async for chunk, text in tts.stream(problematic_text):
-            results.append(text)
+        results = await collect(tts_tokens_3_20, problematic_text)
 
         full_text = " ".join(results)
 
@@ -265,62 +199,52 @@ class TestTiktokenRegressionPrevention:
             f"Ph.D was improperly broken: {full_text}"
         )
 
-    @pytest.mark.asyncio
-    async def test_numbers_and_decimals_preserved(self):
-        """Prevent regression: numbers like 3.14, $5.99 should stay intact."""
-        tts = NanoTTS(model="dummy", min_tokens=3, max_tokens=20)
-
-        test_cases = [
+    @pytest.mark.parametrize(
+        "text",
+        [
             "The value of pi is 3.14159 approximately.",
             "It costs $45.99 per month for the service.",
             "Version 2.1 includes updates to section 1.5.",
             "The temperature was 98.6 degrees Fahrenheit.",
-        ]
-
-        for text in test_cases:
-            results = []
-            async for chunk, segment in tts.stream(text):
-                results.append(segment)
-
-            full_text = " ".join(results)
-
-            # Extract numbers from original text
-            import re
-
-            numbers = re.findall(r"\$?\d+\.\d+", text)
+        ],
+    )
+    @pytest.mark.asyncio
+    async def test_numbers_and_decimals_preserved(self, collect, text, tts_tokens_3_20):
+        """Prevent regression: numbers like 3.14, $5.99 should stay intact."""
+        results = await collect(tts_tokens_3_20, text)
 
-            for number in numbers:
-                assert number in full_text, (
-                    f"Number {number} was broken in: {full_text}"
-                )
+        full_text = " ".join(results)
 
-    @pytest.mark.asyncio
-    async def test_markdown_cleaning_regression(self):
-        """Prevent regression: markdown should be cleaned consistently."""
-        tts = NanoTTS(model="dummy", min_tokens=3, max_tokens=20)
+        # Every number in the original text must come out whole
+        broken = set(_NUM_RE.findall(text)) - set(_NUM_RE.findall(full_text))
+        assert not broken, f"Numbers {sorted(broken)} were broken in: {full_text}"
 
-        # Test various markdown formats that could cause issues
-        markdown_inputs = [
+    # Test various markdown formats that could cause issues
+    @pytest.mark.parametrize(
+        "markdown_text",
+        [
             "### Key Characteristics of a Ph.D.:",
             "**Advanced Research**: A Ph.D. program typically involves...",
             "The `process()` function returns a Ph.D. candidate.",
             "> Quote: Dr. Smith has a Ph.D. in Computer Science.",
-        ]
-
-        for markdown_text in markdown_inputs:
-            results = []
-            async for chunk, segment in tts.stream(markdown_text):
-                results.append(segment)
+        ],
+    )
+    @pytest.mark.asyncio
+    async def test_markdown_cleaning_regression(
+        self, collect, markdown_text, tts_tokens_3_20
+    ):
+        """Prevent regression: markdown should be cleaned consistently."""
+        results = await collect(tts_tokens_3_20, markdown_text)
 
-            full_text = " ".join(results)
+        full_text = " ".join(results)
 
-            # Ensure markdown symbols are removed
-            assert "**" not in full_text, f"Bold markdown not cleaned: {full_text}"
-            assert "###" not in full_text, f"Header markdown not cleaned: {full_text}"
-            assert "`" not in full_text, f"Code markdown not cleaned: {full_text}"
+        # Ensure markdown symbols are removed
+        assert "**" not in full_text, f"Bold markdown not cleaned: {full_text}"
+        assert "###" not in full_text, f"Header markdown not cleaned: {full_text}"
+        assert "`" not in full_text, f"Code markdown not cleaned: {full_text}"
 
-            # Ensure Ph.D. is preserved if present
-            if "Ph.D" in markdown_text:
-                assert "Ph.D" in full_text, (
-                    f"Ph.D not preserved after markdown cleaning: {full_text}"
-                )
+        # Ensure Ph.D. is preserved if present
+        if "Ph.D" in markdown_text:
+            assert "Ph.D" in full_text, (
+                f"Ph.D not preserved after markdown cleaning: {full_text}"
+            )
@@ -1,7 +1,7 @@
 import pytest
 
-from nanotts.audio_data import AudioSpec, UnsupportedFormat
-from nanotts.engine import CallableEngine
+from nanotts.audio_data import AudioChunk, AudioSpec, UnsupportedFormat
+from nanotts.engine import CallableEngine, cached_synth
 
 
 def test_audio_spec_equality():
@@ -15,29 +15,107 @@ def test_audio_spec_equality():
 
 
 @pytest.mark.asyncio
-async def test_callable_engine():
+async def test_callable_engine(spec_pcm_16k):
     """Test CallableEngine wrapper."""
 
     def dummy_tts(text: str) -> bytes:
         return f"audio:{text}".encode()
 
-    spec = AudioSpec("pcm", 16000, 1, 16)
-    engine = CallableEngine(dummy_tts, output_spec=spec)
+    engine = CallableEngine(dummy_tts, output_spec=spec_pcm_16k)
 
     chunk = await engine.synth("hello")
 
     assert chunk.data == b"audio:hello"
-    assert chunk.spec == spec
+    assert chunk.spec == spec_pcm_16k
 
 
-def test_unsupported_format_exception():
+def test_unsupported_format_exception(spec_pcm_16k, spec_mp3_24k):
     """Test UnsupportedFormat exception."""
-    source = AudioSpec("mp3", 24000, 1, None)
-    target = AudioSpec("pcm", 16000, 1, 16)
+    exc = UnsupportedFormat(spec_mp3_24k, spec_pcm_16k)
 
-    exc = UnsupportedFormat(source, target)
-
-    assert exc.source == source
-    assert exc.target == target
+    assert exc.source == spec_mp3_24k
+    assert exc.target == spec_pcm_16k
     assert "mp3" in str(exc)
     assert "pcm" in str(exc)
+
+
+@pytest.mark.asyncio
+async def test_callable_engine_synth_cache(spec_pcm_16k):
+    """Test repeated segments are served from the synth cache."""
+    calls = []
+
+    def counting_tts(text: str) -> bytes:
+        calls.append(text)
+        return f"audio:{text}".encode()
+
+    engine = CallableEngine(counting_tts, output_spec=spec_pcm_16k)
+
+    first = await engine.synth("hello")
+    second = await engine.synth("hello")
+    await engine.synth("world")
+
+    assert calls == ["hello", "world"]
+    assert second.data == first.data
+    assert second is not first
+
+    engine.cache_clear()
+    await engine.synth("hello")
+    assert calls == ["hello", "world", "hello"]
+
+
+@pytest.mark.asyncio
+async def test_synth_cache_evicts_least_recent(spec_pcm_16k):
+    """Test the synth cache is bounded."""
+    calls = []
+
+    def counting_tts(text: str) -> bytes:
+        calls.append(text)
+        return text.encode()
+
+    engine = CallableEngine(counting_tts, output_spec=spec_pcm_16k, cache_size=2)
+
+    for text in ["a", "b", "a", "c", "a", "b"]:
+        await engine.synth(text)
+
+    # "b" was least recently used when "c" arrived
+    assert calls == ["a", "b", "c", "b"]
+
+
+@pytest.mark.asyncio
+async def test_synth_cache_disabled(spec_pcm_16k):
+    """Test cache_size=0 calls the function for every synth."""
+    calls = []
+
+    def counting_tts(text: str) -> bytes:
+        calls.append(text)
+        return text.encode()
+
+    engine = CallableEngine(counting_tts, output_spec=spec_pcm_16k, cache_size=0)
+
+    await engine.synth("hello")
+    await engine.synth("hello")
+
+    assert calls == ["hello", "hello"]
+    assert getattr(engine, "_synth_cache", None) is None
+
+
+@pytest.mark.asyncio
+async def test_synth_cache_key_includes_engine_settings(spec_pcm_16k):
+    """Test changing a setting in _cache_key_extra() misses the cache."""
+
+    class VoiceEngine:
+        def __init__(self):
+            self.voice = "a"
+
+        def _cache_key_extra(self):
+            return (self.voice,)
+
+        @cached_synth
+        async def synth(self, text, *, target=None):
+            return AudioChunk(f"{self.voice}:{text}".encode(), spec_pcm_16k)
+
+    engine = VoiceEngine()
+    assert (await engine.synth("hello")).data == b"a:hello"
+
+    engine.voice = "b"
+    assert (await engine.synth("hello")).data == b"b:hello"
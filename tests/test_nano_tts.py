@@ -2,19 +2,18 @@ import anyio
 import pytest
 
 from nanotts import AudioChunk, AudioSpec, NanoTTS
+from nanotts.engine import Engine
+from nanotts.nano_tts import BATCH_WINDOW_S, _CoalescedTokens
+from nanotts.segmenter import StreamToken
 
 
 class TestNanoTTS:
     """Core NanoTTS functionality tests."""
 
     @pytest.mark.asyncio
-    async def test_basic_synthesis(self):
+    async def test_basic_synthesis(self, tts_default):
         """Test basic text-to-speech synthesis."""
-        tts = NanoTTS(model="dummy")
-
-        chunks = []
-        async for chunk, text in tts.stream("Hello, world!"):
-            chunks.append((chunk, text))
+        chunks = [item async for item in tts_default.stream("Hello, world!")]
 
         assert len(chunks) >= 1
         assert all(isinstance(chunk, AudioChunk) for chunk, _ in chunks)
@@ -25,7 +24,7 @@ class TestNanoTTS:
         assert "Hello" in full_text and "world" in full_text
 
     @pytest.mark.asyncio
-    async def test_segment_ordering(self):
+    async def test_segment_ordering(self, collect):
         """Test that segments are yielded in correct order with token-based logic."""
         tts = NanoTTS(model="dummy", min_tokens=2, max_tokens=15)
 
@@ -34,11 +33,9 @@ class TestNanoTTS:
             parts = ["First. ", "Second. ", "Third."]
             for part in parts:
                 yield part
-                await anyio.sleep(0.01)
+                await anyio.sleep(0)
 
-        results = []
-        async for chunk, text in tts.stream(incremental_text()):
-            results.append(text)
+        results = await collect(tts, incremental_text())
 
         # Should maintain order and handle sentence boundaries
         assert len(results) >= 1
@@ -54,42 +51,149 @@ class TestNanoTTS:
             assert second_pos < third_pos
 
     @pytest.mark.asyncio
-    async def test_cancellation(self):
+    async def test_reorder_out_of_order_segments(self, spec_pcm_16k):
+        """Test segments finishing out of order are yielded by id."""
+        tts = NanoTTS(model="dummy")
+        tts._token = StreamToken()
+
+        send_stream, recv_stream = anyio.create_memory_object_stream(max_buffer_size=8)
+        for segment_id in (2, 0, 3, 1, 4):
+            await send_stream.send(
+                (segment_id, AudioChunk(b"", spec_pcm_16k), str(segment_id))
+            )
+        await send_stream.aclose()
+
+        results = [text async for _, text in tts._reorder_consumer(recv_stream)]
+
+        assert results == ["0", "1", "2", "3", "4"]
+
+    @pytest.mark.asyncio
+    async def test_concurrent_synth_matches_in_order_path(self, tts_tokens_1_10):
+        """Test the reorder path yields the same segments as the default path."""
+        text = "First. Second. Third. Fourth."
+
+        reordering = NanoTTS(
+            model="dummy", min_tokens=1, max_tokens=10, concurrent_synth=True
+        )
+
+        expected = [segment async for _, segment in tts_tokens_1_10.stream(text)]
+        results = [segment async for _, segment in reordering.stream(text)]
+
+        assert len(expected) > 1
+        assert results == expected
+
+    def test_synth_workers_overlap(self, run_virtual_time, spec_pcm_16k):
+        """Test concurrent workers overlap slow synthesis and keep order."""
+
+        class SlowEngine(Engine):
+            async def synth(self, text, *, target=None):
+                await anyio.sleep(0.1)
+                return AudioChunk(text.encode(), spec_pcm_16k)
+
+        async def run(concurrent_synth):
+            tts = NanoTTS(
+                engine=SlowEngine(),
+                min_tokens=1,
+                max_tokens=10,
+                concurrent_synth=concurrent_synth,
+                synth_workers=4,
+            )
+            start = anyio.current_time()
+            results = [text async for _, text in tts.stream("One. Two. Three. Four.")]
+            return results, anyio.current_time() - start
+
+        expected, sequential = run_virtual_time(run, False)
+        results, parallel = run_virtual_time(run, True)
+
+        assert len(expected) == 4
+        assert results == expected
+        assert parallel < sequential / 2
+
+    @pytest.mark.asyncio
+    async def test_concurrent_synth_skips_failed_segment(self, spec_pcm_16k):
+        """Test a failed segment doesn't stall the reorder buffer."""
+
+        class FlakyEngine(Engine):
+            async def synth(self, text, *, target=None):
+                if "Two" in text:
+                    raise RuntimeError("synthesis failed")
+                return AudioChunk(text.encode(), spec_pcm_16k)
+
+        tts = NanoTTS(
+            engine=FlakyEngine(), min_tokens=1, max_tokens=10, concurrent_synth=True
+        )
+
+        with anyio.fail_after(1):
+            results = [text async for _, text in tts.stream("One. Two. Three.")]
+
+        assert "".join(results) == "One. Three."
+
+    @pytest.mark.asyncio
+    async def test_cancellation(self, collect, tts_tokens_1_10):
         """Test cancellation stops synthesis immediately."""
-        tts = NanoTTS(model="dummy", min_tokens=1, max_tokens=10)
 
         # Use incremental input to better test cancellation
         async def slow_text():
             parts = ["Hello", " world", ". More", " text", " here."]
             for i, part in enumerate(parts):
                 if i == 2:  # Cancel after "Hello world. More"
-                    tts.cancel()
+                    tts_tokens_1_10.cancel()
                 yield part
-                await anyio.sleep(0.01)
+                await anyio.sleep(0)
 
-        results = []
-        async for chunk, text in tts.stream(slow_text()):
-            results.append(text)
+        results = await collect(tts_tokens_1_10, slow_text())
 
         # Should stop after cancellation
         full_text = " ".join(results)
         assert "text here" not in full_text  # Should not process cancelled text
 
     @pytest.mark.asyncio
-    async def test_streaming_input(self):
+    async def test_cancellation_interrupts_synthesis(self, spec_pcm_16k):
+        """Test cancel() unwinds a synth call instead of waiting for it."""
+
+        class SlowEngine(Engine):
+            async def synth(self, text, *, target=None):
+                await anyio.sleep(10)
+                return AudioChunk(text.encode(), spec_pcm_16k)
+
+        tts = NanoTTS(engine=SlowEngine(), min_tokens=1, max_tokens=10)
+
+        async def cancel_soon():
+            await anyio.sleep(0.01)
+            tts.cancel()
+
+        with anyio.fail_after(1):
+            async with anyio.create_task_group() as tg:
+                tg.start_soon(cancel_soon)
+                results = [text async for _, text in tts.stream("Hello. World.")]
+
+        assert results == []
+
+    @pytest.mark.asyncio
+    async def test_cancel_inside_consumer_loop(self):
+        """Test cancel() from the async for body doesn't cancel the caller."""
+        tts = NanoTTS(model="dummy", min_tokens=1, max_tokens=10)
+
+        results = []
+        async for _, text in tts.stream("One. Two. Three. Four."):
+            results.append(text)
+            tts.cancel()
+            await anyio.sleep(0.01)  # e.g. playback; must not raise
+
+        assert results == ["One."]
+
+    @pytest.mark.asyncio
+    async def test_streaming_input(self, collect):
         """Test streaming text input (like from LLM)."""
 
         async def token_stream():
             tokens = ["Hello", ",", " ", "streaming", " ", "world", "!"]
             for token in tokens:
                 yield token
-                await anyio.sleep(0.01)  # Simulate LLM delay
 
         tts = NanoTTS(model="dummy", timeout_ms=100)
 
-        results = []
-        async for chunk, text in tts.stream(token_stream()):
-            results.append(text)
+        results = await collect(tts, token_stream())
 
         # Should handle streaming and produce segments
         assert len(results) >= 1
@@ -98,6 +202,102 @@ class TestNanoTTS:
         assert "streaming" in full_text
         assert "world" in full_text
 
+    @pytest.mark.asyncio
+    async def test_streaming_input_survives_timeout(self):
+        """Test a pause longer than timeout_ms flushes without dropping later text."""
+
+        async def paused_stream():
+            yield "Hello"
+            await anyio.sleep(0.15)  # Between one and two timeouts
+            yield " world"
+
+        tts = NanoTTS(model="dummy", timeout_ms=100)
+
+        results = [text async for _, text in tts.stream(paused_stream())]
+
+        assert results == ["Hello", " world"]
+
+    def test_coalesce_holds_tokens(self, run_virtual_time):
+        """Test the hold window merges close tokens up to punctuation."""
+        tokens = ["Hello", ",", " stream", "ing", " world", ". Next"]
+
+        async def run(hold_s):
+            send_stream, recv_stream = anyio.create_memory_object_stream(
+                max_buffer_size=64
+            )
+
+            async def produce():
+                async with send_stream:
+                    for token in tokens:
+                        await send_stream.send(token)
+                        await anyio.sleep(0.002)
+
+            async with anyio.create_task_group() as tg:
+                tg.start_soon(produce)
+                return [chunk async for chunk in _CoalescedTokens(recv_stream, hold_s)]
+
+        assert run_virtual_time(run, 0.0) == tokens
+        assert run_virtual_time(run, 0.01) == ["Hello,", " streaming world. Next"]
+
+    @pytest.mark.asyncio
+    async def test_batching_engine(self, spec_pcm_16k):
+        """Test segments after the first are grouped for batch-capable engines."""
+
+        class BatchEngine(Engine):
+            supports_batch = True
+
+            def __init__(self):
+                self.batches = []
+
+            async def synth(self, text, *, target=None):
+                self.batches.append([text])
+                return AudioChunk(text.encode(), spec_pcm_16k)
+
+            async def synth_batch(self, texts, *, target=None):
+                self.batches.append(list(texts))
+                return [AudioChunk(text.encode(), spec_pcm_16k) for text in texts]
+
+        engine = BatchEngine()
+        tts = NanoTTS(engine=engine, min_tokens=1, max_tokens=10)
+
+        results = [text async for _, text in tts.stream("One. Two. Three. Four.")]
+
+        assert "".join(results) == "One. Two. Three. Four."
+        assert engine.batches[0] == [results[0]]
+        assert len(engine.batches) < len(results)
+
+    def test_batching_adds_no_wait_for_queued_segments(
+        self, run_virtual_time, spec_pcm_16k
+    ):
+        """Test segments that waited in the queue aren't held for the window."""
+
+        class BatchEngine(Engine):
+            supports_batch = True
+
+            async def synth(self, text, *, target=None):
+                await anyio.sleep(0.1)  # Later segments queue up meanwhile
+                return AudioChunk(text.encode(), spec_pcm_16k)
+
+            async def synth_batch(self, texts, *, target=None):
+                return [AudioChunk(text.encode(), spec_pcm_16k) for text in texts]
+
+        async def source():
+            yield "One. Two. Three. "
+            await anyio.sleep(0.5)  # The stream stays open
+
+        async def run():
+            tts = NanoTTS(engine=BatchEngine(), min_tokens=1, max_tokens=10)
+            start = anyio.current_time()
+            return [
+                (text, anyio.current_time() - start)
+                async for _, text in tts.stream(source())
+            ]
+
+        results = run_virtual_time(run)
+
+        assert [text for text, _ in results] == ["One.", " Two.", " Three."]
+        assert results[1][1] < 0.1 + BATCH_WINDOW_S
+
     @pytest.mark.asyncio
     async def test_engine_factory_kwargs(self):
         """Test engine creation with custom parameters."""
@@ -125,14 +325,10 @@ class TestNanoTTS:
             break
 
     @pytest.mark.asyncio
-    async def test_multilingual_text(self):
+    async def test_multilingual_text(self, collect, tts_tokens_3_20, encoder):
         """Test with mixed language text and consistent token counting."""
-        tts = NanoTTS(model="dummy", min_tokens=3, max_tokens=20)
-
         # Test that token counting works consistently across languages
-        results = []
-        async for chunk, text in tts.stream("Hello world. 你好世界。How are you?"):
-            results.append(text)
+        results = await collect(tts_tokens_3_20, "Hello world. 你好世界。How are you?")
 
         # Should handle multilingual text appropriately
         assert len(results) >= 1
@@ -140,36 +336,27 @@ class TestNanoTTS:
         assert "你好" in full_text and "世界" in full_text
 
         # Test token counting consistency
-        import tiktoken
-
-        enc = tiktoken.get_encoding("cl100k_base")
 
         # English and Chinese should be counted consistently
         en_text = "Hello world"
         zh_text = "你好世界"
 
-        en_tokens = len(enc.encode(en_text))
-        zh_tokens = len(enc.encode(zh_text))
+        en_tokens = len(encoder.encode(en_text))
+        zh_tokens = len(encoder.encode(zh_text))
 
         # Both should be tokenized (this is mainly to verify tiktoken works)
         assert en_tokens > 0 and zh_tokens > 0
 
     @pytest.mark.asyncio
-    async def test_empty_input(self):
+    async def test_empty_input(self, collect, tts_default):
         """Test handling of empty or whitespace input."""
-        tts = NanoTTS(model="dummy")
-
-        results = []
-        async for chunk, text in tts.stream(""):
-            results.append(text)
+        results = await collect(tts_default, "")
 
         # Empty input should not produce segments
         assert len(results) == 0
 
         # Test whitespace
-        results = []
-        async for chunk, text in tts.stream("   "):
-            results.append(text)
+        results = await collect(tts_default, "   ")
 
         # Pure whitespace should not produce meaningful segments
         assert len(results) == 0 or all(not text.strip() for text in results)
@@ -1,7 +1,7 @@
 import anyio
 import pytest
 
-from nanotts.segmenter import Segmenter, StreamToken
+from nanotts.segmenter import Segmenter, StreamToken, _scan_for_break
 
 
 class TestSegmenter:
@@ -10,7 +10,7 @@ class TestSegmenter:
     async def _run_segmenter(self, text, **kwargs):
         """Helper to run segmenter and collect results."""
         segments = []
-        send_stream, recv_stream = anyio.create_memory_object_stream()
+        send_stream, recv_stream = anyio.create_memory_object_stream(max_buffer_size=8)
         token = StreamToken()
 
         # Convert old max_len to new token-based API
@@ -51,7 +51,7 @@ class TestSegmenter:
         assert "Ph.D." in segments2[0].text
 
     @pytest.mark.asyncio
-    async def test_token_based_breaking(self):
+    async def test_token_based_breaking(self, encoder):
         """Test token-based breaking when max_tokens reached."""
         # Long text that exceeds token limits
         text = "This is a very long sentence that should break based on token counts. This allows for better multilingual support."
@@ -61,12 +61,11 @@ class TestSegmenter:
         assert len(segments) >= 2
 
         # Test that token limits are respected
-        import tiktoken
-
-        enc = tiktoken.get_encoding("cl100k_base")
-        for segment in segments[:-1]:  # All but last segment
-            tokens = len(enc.encode(segment.text))
-            assert tokens <= 12  # Should not exceed max_tokens
+        # All but last segment should not exceed max_tokens
+        token_counts = [
+            len(encoder.encode_ordinary(segment.text)) for segment in segments[:-1]
+        ]
+        assert all(count <= 12 for count in token_counts), token_counts
 
     @pytest.mark.asyncio
     async def test_multilingual_punctuation(self):
@@ -125,11 +124,10 @@ class TestSegmenter:
         full_text3 = " ".join(seg.text for seg in segments3)
         assert "1. First" in full_text3 or "First step" in full_text3
 
-    @pytest.mark.asyncio
-    async def test_streaming_timeout(self):
+    def test_streaming_timeout(self, run_virtual_time):
         """Test timeout mechanism for streaming input."""
         segments = []
-        send_stream, recv_stream = anyio.create_memory_object_stream()
+        send_stream, recv_stream = anyio.create_memory_object_stream(max_buffer_size=8)
         token = StreamToken()
 
         segmenter = Segmenter(send_stream, timeout_ms=50, token=token)
@@ -142,17 +140,20 @@ class TestSegmenter:
             # First send some text
             yield "Hello"
             # Then wait longer than timeout - this should trigger a segment
-            await anyio.sleep(0.1)  # 100ms > 50ms timeout
+            await anyio.sleep(0.1)  # 100ms > 50ms timeout, in virtual time
             # Then more text
             yield " world"
             # Another delay
             await anyio.sleep(0.1)
             yield "!"
 
-        async with anyio.create_task_group() as tg:
-            tg.start_soon(collect_segments)
-            await segmenter.feed(slow_text_stream())
-            await send_stream.aclose()
+        async def run():
+            async with anyio.create_task_group() as tg:
+                tg.start_soon(collect_segments)
+                await segmenter.feed(slow_text_stream())
+                await send_stream.aclose()
+
+        run_virtual_time(run)
 
         # With timeouts, should create multiple segments
         # At minimum: "Hello" (timeout), then " world!" (final)
@@ -193,7 +194,7 @@ class TestSegmenter:
     async def test_cancellation(self):
         """Test cancellation stops segmentation."""
         segments = []
-        send_stream, recv_stream = anyio.create_memory_object_stream()
+        send_stream, recv_stream = anyio.create_memory_object_stream(max_buffer_size=8)
         token = StreamToken()
 
         segmenter = Segmenter(send_stream, token=token)
@@ -219,3 +220,119 @@ class TestSegmenter:
         assert len(segments) <= 1
         if segments:
             assert "world" not in segments[0].text
+
+    @pytest.mark.asyncio
+    async def test_token_boundary_keeps_characters_whole(self):
+        """Test forced breaks never split a multi-token character."""
+        text = "世界" * 40
+        segments = await self._run_segmenter(text, min_tokens=2, max_tokens=7)
+
+        assert len(segments) >= 2
+        assert "".join(seg.text for seg in segments) == text
+        assert all("�" not in seg.text for seg in segments)
+
+    @pytest.mark.asyncio
+    async def test_cancellation_stops_pending_segments(self):
+        """Test cancelling mid-chunk drops the segments still in the buffer."""
+        segments = []
+        send_stream, recv_stream = anyio.create_memory_object_stream(max_buffer_size=8)
+        token = StreamToken()
+
+        async def cancel_after_first(text):
+            token.cancel()
+            return text
+
+        segmenter = Segmenter(
+            send_stream,
+            token=token,
+            pre_hook=cancel_after_first,
+            min_tokens=2,
+            max_tokens=20,
+        )
+
+        async def collect_segments():
+            async for segment in recv_stream:
+                segments.append(segment)
+
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(collect_segments)
+            await segmenter.feed("One sentence. Two sentence. Three sentence.")
+            await send_stream.aclose()
+
+        assert segments == []
+
+    @pytest.mark.asyncio
+    async def test_cancellation_unblocks_feed(self):
+        """Test cancelling unwinds a feed waiting on a stream nobody reads."""
+        send_stream, recv_stream = anyio.create_memory_object_stream()
+        token = StreamToken()
+        segmenter = Segmenter(send_stream, token=token, min_tokens=2, max_tokens=20)
+
+        with anyio.fail_after(1):
+            async with anyio.create_task_group() as tg:
+                tg.start_soon(segmenter.feed, "One sentence. Two sentence.")
+                await anyio.sleep(0)
+                token.cancel()
+
+        assert token.cancelled()
+        recv_stream.close()
+        send_stream.close()
+
+    def test_slow_consumer_does_not_trigger_timeout(self, run_virtual_time):
+        """Test a send blocked on a slow consumer isn't cut off by the timeout."""
+        segments = []
+        # Unbuffered, so every send waits for the consumer
+        send_stream, recv_stream = anyio.create_memory_object_stream()
+        segmenter = Segmenter(
+            send_stream, token=StreamToken(), timeout_ms=20, min_tokens=2
+        )
+
+        async def sentences():
+            for sentence in ["First one here. ", "Second one here. ", "Third one."]:
+                yield sentence
+
+        async def slow_consumer():
+            async for segment in recv_stream:
+                segments.append(segment.text)
+                await anyio.sleep(0.05)
+
+        async def run():
+            async with anyio.create_task_group() as tg:
+                tg.start_soon(slow_consumer)
+                await segmenter.feed(sentences())
+                await send_stream.aclose()
+
+        run_virtual_time(run)
+
+        assert "".join(segments) == "First one here. Second one here. Third one."
+
+    def test_scan_for_break(self):
+        """Test the break scanner prefers tier 1 and honours the threshold."""
+        text = "One, two. Three, four"
+        assert _scan_for_break(text, 0, 0, False) == text.index(".") + 1
+        # Past the only tier 1 break, a comma is used only when allowed
+        past_period = text.index(".") + 1
+        assert _scan_for_break(text, 0, past_period, False) == 0
+        assert _scan_for_break(text, 0, past_period, True) == text.index("four")
+        assert _scan_for_break("no separators here", 0, 0, True) == 0
+
+    @pytest.mark.asyncio
+    async def test_long_string_respects_max_tokens(self, encoder):
+        """Test one large input yields only segments within max_tokens."""
+        text = "Some words, then more words without an ending " * 20 + "done."
+        segments = await self._run_segmenter(text, min_tokens=3, max_tokens=15)
+
+        assert len(segments) > 2
+        assert "".join(seg.text for seg in segments).split() == text.split()
+        token_counts = [
+            len(encoder.encode_ordinary(segment.text)) for segment in segments
+        ]
+        assert all(count <= 15 for count in token_counts), token_counts
+
+    @pytest.mark.asyncio
+    async def test_special_token_text_is_plain_text(self):
+        """Test text spelling a special token is segmented, not rejected."""
+        text = "The model stopped here. <|endoftext|>"
+        segments = await self._run_segmenter(text, min_tokens=3, max_tokens=20)
+
+        assert "".join(seg.text for seg in segments) == text